@@ -0,0 +1,111 @@
+import io
+import random
+from typing import Dict, List
+
+# Resume sizes as (experience entries, bullet points per entry)
+RESUME_SIZES = {"small": (2, 3), "medium": (6, 5), "large": (20, 8)}
+# Number of fillable controls per synthetic application form
+FORM_SIZES = {"small": 8, "medium": 30, "large": 120}
+PDF_LINES_PER_PAGE = 48
+
+_WORDS = (
+    "designed built shipped scaled migrated automated reduced improved led mentored analyzed deployed "
+    "python sql kubernetes react api pipeline latency throughput revenue customers platform service "
+    "team roadmap metrics dashboard reliability security cloud data model experiment release"
+).split()
+_FIELD_LABELS = (
+    "Full name", "Email", "Phone", "LinkedIn profile", "Portfolio URL", "Current company", "Current title",
+    "Years of experience", "Highest degree", "University", "Graduation year", "Current GPA", "City", "Country",
+    "Work authorization", "Expected salary", "Notice period", "Why do you want to join us?", "Cover letter",
+    "Describe a challenging project"
+)
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    return ' '.join(rng.choice(_WORDS) for _ in range(words)).capitalize() + '.'
+
+def resume_text(size: str = "medium", seed: int = 0) -> str:
+    """Plain-text resume with the section headers the parser recognises"""
+    rng = random.Random(seed)
+    entries, bullets = RESUME_SIZES[size]
+    lines = ["Jane Benchmark", "jane.benchmark@example.com | +1 555 0100 | Springfield", "", "Summary", _sentence(rng, 30), "", "Experience"]
+    for i in range(entries):
+        lines.append(f"Senior Engineer, Company {i} ({2020 - i} - {2021 - i})")
+        lines.extend(f"- {_sentence(rng)}" for _ in range(bullets))
+        lines.append("")
+    lines += ["Education", "B.Sc. Computer Science, State University, 2012", "", "Skills", ', '.join(rng.sample(_WORDS, 12)), ""]
+    lines += ["Projects"] + [f"- Project {i}: {_sentence(rng, 16)}" for i in range(max(2, entries // 2))]
+    return '\n'.join(lines)
+
+def make_txt(text: str) -> bytes:
+    return text.encode('utf-8')
+
+def make_docx(text: str) -> bytes:
+    import docx
+    document = docx.Document()
+    for line in text.split('\n'):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def make_pdf(text: str) -> bytes:
+    """Minimal uncompressed PDF with one Helvetica text block per page"""
+    lines = text.split('\n')
+    pages = [lines[i:i + PDF_LINES_PER_PAGE] for i in range(0, len(lines), PDF_LINES_PER_PAGE)] or [[]]
+    objects = {1: "<< /Type /Catalog /Pages 2 0 R >>", 3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for i, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 750 Td"]
+        for line in page_lines:
+            escaped = line.encode('latin-1', 'replace').decode('latin-1').replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = '\n'.join(ops)
+        objects[page_id] = f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n{objects[number]}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += ''.join(f"{offsets[number]:010d} 00000 n \n" for number in sorted(objects)).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+RESUME_FORMATS = {
+    "txt": (make_txt, "resume.txt", "text/plain"),
+    "docx": (make_docx, "resume.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "pdf": (make_pdf, "resume.pdf", "application/pdf")
+}
+
+def resume_file(kind: str, size: str, seed: int = 0) -> Dict:
+    build, file_name, content_type = RESUME_FORMATS[kind]
+    return {"file_name": file_name, "content_type": content_type, "content": build(resume_text(size, seed))}
+
+def form_dom(size: str = "medium", seed: int = 0) -> str:
+    """Scraped-looking application page: labelled controls buried in layout markup, scripts and styles"""
+    rng = random.Random(seed)
+    parts: List[str] = [
+        "<html><head><style>.field{margin:4px}</style><script>window.analytics={track:function(){}}</script></head><body>",
+        "<nav>" + "".join(f'<a href="/jobs/{i}">Job {i}</a>' for i in range(20)) + "</nav>",
+        '<form id="application">'
+    ]
+    for i in range(FORM_SIZES[size]):
+        label = _FIELD_LABELS[i % len(_FIELD_LABELS)] + (f" {i // len(_FIELD_LABELS)}" if i >= len(_FIELD_LABELS) else "")
+        field_id = f"field_{i}"
+        if "?" in label or "letter" in label.lower() or "Describe" in label:
+            control = f'<textarea id="{field_id}" name="{field_id}" rows="6"></textarea>'
+        elif label.startswith(("Highest degree", "Work authorization", "Country")):
+            options = "".join(f"<option>{rng.choice(_WORDS).title()}</option>" for _ in range(8))
+            control = f'<select id="{field_id}" name="{field_id}">{options}</select>'
+        else:
+            control = f'<input type="text" id="{field_id}" name="{field_id}" placeholder="{label}" class="field input-lg" data-track="{rng.random():.6f}">'
+        parts.append(f'<div class="row"><div class="col"><label for="{field_id}">{label}</label>{control}</div><span class="hint">{_sentence(rng, 6)}</span></div>')
+    parts.append('<input type="hidden" name="csrf" value="x"><button type="submit">Apply</button></form></body></html>')
+    return ''.join(parts)
@@ -0,0 +1,72 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+APP_PACKAGES = ("main", "config", "middleware", "routes", "services", "models")
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+def parse_importtime(output: str) -> List[Dict]:
+    """Rows of `python -X importtime` output as {module, self_us, cumulative_us, depth}"""
+    rows = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": (len(match.group(3)) - 1) // 2
+            })
+    return rows
+
+def summarize(rows: List[Dict], module: str) -> Dict:
+    packages: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        packages[row["module"].split(".")[0]] += row["self_us"]
+    root = next((row for row in rows if row["module"] == module), None)
+    ms = lambda us: round(us / 1000, 1)
+    return {
+        "module": module,
+        "total_ms": ms(root["cumulative_us"] if root else sum(row["self_us"] for row in rows)),
+        "modules_imported": len(rows),
+        # Self time summed per top-level package: the number to watch when a dependency creeps into startup
+        "packages_ms": {name: ms(us) for name, us in sorted(packages.items(), key=lambda item: -item[1])},
+        "app_modules_ms": {row["module"]: ms(row["cumulative_us"]) for row in sorted(rows, key=lambda row: -row["cumulative_us"])
+                           if row["module"].split(".")[0] in APP_PACKAGES}
+    }
+
+def profile_imports(module: str = "main", runs: int = 3, env: Dict = None) -> Dict:
+    """Import module in fresh interpreters and keep the fastest run, which has the least scheduling noise"""
+    best = None
+    for _ in range(max(1, runs)):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=BACKEND_DIR,
+                                env={**os.environ, **(env or {})}, capture_output=True, text=True, timeout=120)
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+        summary = summarize(parse_importtime(result.stderr), module)
+        if best is None or summary["total_ms"] < best["total_ms"]:
+            best = summary
+    return {**best, "runs": runs}
+
+def print_report(report: Dict, top: int = 15):
+    print(f"import {report['module']}: {report['total_ms']:.1f} ms, {report['modules_imported']} modules (best of {report['runs']})")
+    print("\nSelf time by package:")
+    for name, ms in list(report["packages_ms"].items())[:top]:
+        print(f"  {name:30} {ms:8.1f} ms")
+    print("\nApp modules (cumulative):")
+    for name, ms in list(report["app_modules_ms"].items())[:top]:
+        print(f"  {name:30} {ms:8.1f} ms")
+
+def compare(report: Dict, baseline: Dict, top: int = 15):
+    change = lambda new, prev: f"{new - prev:+8.1f} ms" if prev is not None else "     new"
+    print(f"\nCompared with baseline: total {change(report['total_ms'], baseline.get('total_ms'))}")
+    old = baseline.get("packages_ms", {})
+    names = sorted(set(report["packages_ms"]) | set(old), key=lambda name: -abs(report["packages_ms"].get(name, 0) - old.get(name, 0)))
+    for name in names[:top]:
+        print(f"  {name:30} {change(report['packages_ms'].get(name, 0), old.get(name))}")
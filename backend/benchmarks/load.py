@@ -0,0 +1,134 @@
+import asyncio
+import random
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+from benchmarks import fixtures
+from benchmarks.run import _failed, summarize
+
+OPERATIONS = ("upload", "settings", "application_enhance", "application_stream", "resume_enhance")
+
+# Relative weights of each operation; a user's next request is drawn from these
+MIXES = {
+    "default": {"upload": 1, "settings": 3, "application_enhance": 4, "application_stream": 1, "resume_enhance": 1},
+    "settings": {"upload": 1, "settings": 8, "application_enhance": 1},
+    "fill": {"upload": 1, "application_enhance": 6, "application_stream": 3},
+    "upload": {"upload": 6, "settings": 2, "application_enhance": 2}
+}
+
+_KEYWORDS = ("Python", "Kubernetes", "SQL", "React", "leadership", "AWS", "Go", "data pipelines", "testing", "Rust")
+_FOCUSES = ("Clarity & Conciseness", "Impact & Achievement", "Keywords Optimization")
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """A mix name from MIXES, or op=weight pairs such as upload=1,settings=4,application_enhance=5"""
+    if value in MIXES:
+        return dict(MIXES[value])
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}; expected one of {', '.join(OPERATIONS)} or a mix: {', '.join(MIXES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+class VirtualUser:
+    """One closed-loop client: uploads its own resume, then issues operations drawn from the mix until the deadline"""
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], rng: random.Random, formats: List[str], sizes: List[str]):
+        self.client = client
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.rng = rng
+        self.formats = formats
+        self.sizes = sizes
+        self.resume_id: Optional[str] = None
+
+    async def upload(self) -> httpx.Response:
+        resume = fixtures.resume_file(self.rng.choice(self.formats), self.rng.choice(self.sizes), seed=self.rng.randrange(4))
+        response = await self.client.post("/api/resume/upload", files={"file": (resume["file_name"], resume["content"], resume["content_type"])})
+        if response.status_code == 200 and response.json().get("resume_id"):
+            self.resume_id = response.json()["resume_id"]
+        return response
+
+    async def settings(self) -> httpx.Response:
+        keywords = ", ".join(self.rng.sample(_KEYWORDS, self.rng.randint(1, 4)))
+        body = {"target_keywords": keywords, "enhancement_focus": self.rng.choice(_FOCUSES), "additional_info": {"GPA": str(self.rng.randint(30, 40) / 10)}}
+        return await self.client.patch("/api/resume/settings", params={"resume_id": self.resume_id}, json=body)
+
+    def _application_body(self) -> Dict:
+        size = self.rng.choice(self.sizes)
+        return {"resume_id": self.resume_id, "application_content": fixtures.form_dom(size, seed=self.rng.randrange(4)), "bypass_cache": True}
+
+    async def application_enhance(self) -> httpx.Response:
+        return await self.client.post("/api/application/enhance", json=self._application_body())
+
+    async def application_stream(self) -> httpx.Response:
+        async with self.client.stream("POST", "/api/application/enhance/stream", json=self._application_body()) as response:
+            await response.aread()  # latency includes the whole stream
+        return response
+
+    async def resume_enhance(self) -> httpx.Response:
+        body = {"resume_id": self.resume_id, "job_title": "Software Engineer", "company": "Example", "field": "Technology", "bypass_cache": True}
+        return await self.client.post("/api/resume/enhance", json=body)
+
+    async def run(self, deadline: float, latencies: Dict[str, List[float]], errors: Dict[str, int]):
+        await self.upload()  # not measured: every user needs a session first
+        while time.perf_counter() < deadline:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = not _failed(await getattr(self, operation)())
+            except Exception:
+                ok = False
+            if ok:
+                latencies[operation].append(time.perf_counter() - start)
+            else:
+                errors[operation] += 1
+
+async def run_load(base_url: str, args, mix: Dict[str, float]) -> List[Dict]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    limits = httpx.Limits(max_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        users = [VirtualUser(client, mix, random.Random(args.seed + i), args.formats, args.sizes) for i in range(args.users)]
+        start = time.perf_counter()
+        await asyncio.gather(*(user.run(start + args.duration, latencies, errors) for user in users))
+        wall = time.perf_counter() - start
+    results = []
+    # Shaped like the scenario results so --compare works on load runs too
+    for operation in mix:
+        summary = summarize(latencies[operation], errors[operation], wall)
+        results.append({"scenario": operation, "variant": f"mix/{args.mix}", "payload_bytes": 0, "concurrency": args.users, **summary})
+        print(f"{operation:20} users={args.users:<3} {summary['requests']:6} req  {summary['throughput_rps']:8.2f} req/s  "
+              f"p50={summary['latency_ms']['p50']:8.1f}ms  p95={summary['latency_ms']['p95']:8.1f}ms  "
+              f"p99={summary['latency_ms']['p99']:8.1f}ms  errors={summary['errors']}")
+    return results
+
+def _slug(route: str) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or "root"
+
+def fetch_profile(base_url: str, output_dir: Path, top: int = 8) -> Optional[Dict]:
+    """Save the app's folded stacks, one file per route, and print the hottest leaf frames"""
+    try:
+        stats = httpx.get(f"{base_url}/debug/profile", params={"top": top}, timeout=30)
+    except httpx.HTTPError as e:
+        print(f"Could not fetch the profile: {e}")
+        return None
+    if stats.status_code == 404:
+        print("The app is not profiling; start it with PROFILING_ENABLED=true or pass --profile-app")
+        return None
+    stats = stats.json()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "all.folded").write_text(httpx.get(f"{base_url}/debug/profile/folded", timeout=30).text)
+    print(f"\nProfile ({stats['interval'] * 1000:.0f} ms interval, folded stacks in {output_dir}):")
+    for route, profile in stats["routes"].items():
+        folded = httpx.get(f"{base_url}/debug/profile/folded", params={"route": route}, timeout=30).text
+        (output_dir / f"{_slug(route)}.folded").write_text(folded)
+        print(f"  {route}: {profile['requests']} requests, {profile['samples']} samples, "
+              f"{profile['await_share'] * 100:.0f}% suspended, mean {profile['mean_wall_ms']:.1f} ms")
+        for frame in profile["top_frames"]:
+            print(f"      {frame['share'] * 100:5.1f}%  {frame['frame']}")
+    return stats
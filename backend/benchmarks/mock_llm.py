@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import json
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+CHARS_PER_TOKEN = 4
+
+@dataclass
+class MockLLMConfig:
+    latency: float = 0.2  # seconds before the first token
+    token_rate: float = 200.0  # completion tokens per second, 0 for instant
+    completion_tokens: int = 120
+
+def _prompt_tokens(messages: List[Dict]) -> int:
+    return sum(len(m.get("content") or "") for m in messages) // CHARS_PER_TOKEN + 1
+
+def _completion_tokens_text(count: int) -> List[str]:
+    # Field lines in the format the application routes parse, emitted one word ("token") at a time
+    tokens = []
+    line = 0
+    while len(tokens) < count:
+        tokens.extend(f"Field {line}: generated answer number {line} [#field_{line}]\n".split(" "))
+        line += 1
+    return [token if token.endswith("\n") else token + " " for token in tokens[:count]]
+
+class _PrefixCache:
+    """Reports cached prompt tokens for repeated system messages, like a provider-side prefix cache"""
+
+    def __init__(self):
+        self._seen = set()
+
+    def cached_tokens(self, messages: List[Dict]) -> int:
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        key = hashlib.sha256(system.encode()).hexdigest()
+        hit = key in self._seen
+        self._seen.add(key)
+        return _prompt_tokens([{"content": system}]) if hit else 0
+
+def create_app(config: MockLLMConfig) -> FastAPI:
+    """OpenAI- and Ollama-compatible completion endpoints with configurable latency and token rate"""
+    app = FastAPI(title="Mock LLM")
+    prefix_cache = _PrefixCache()
+
+    async def tokens():
+        await asyncio.sleep(config.latency)
+        for token in _completion_tokens_text(config.completion_tokens):
+            if config.token_rate:
+                await asyncio.sleep(1 / config.token_rate)
+            yield token
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        usage = {
+            "prompt_tokens": _prompt_tokens(messages),
+            "completion_tokens": config.completion_tokens,
+            "total_tokens": _prompt_tokens(messages) + config.completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": prefix_cache.cached_tokens(messages)}
+        }
+        base = {"id": "mock", "created": int(time.time()), "model": body.get("model", "mock")}
+        if not body.get("stream"):
+            content = "".join([token async for token in tokens()])
+            return {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            }
+
+        async def events():
+            async for token in tokens():
+                chunk = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        messages = [{"content": body.get("system", "")}, {"content": body.get("prompt", "")}]
+        done = {"model": body.get("model"), "done": True, "prompt_eval_count": _prompt_tokens(messages), "eval_count": config.completion_tokens}
+        if not body.get("stream", True):
+            return {**done, "response": "".join([token async for token in tokens()])}
+
+        async def lines():
+            async for token in tokens():
+                yield json.dumps({"model": body.get("model"), "response": token, "done": False}) + "\n"
+            yield json.dumps({**done, "response": ""}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class MockLLMServer:
+    """Runs the mock endpoints on a background thread"""
+
+    def __init__(self, config: MockLLMConfig, port: Optional[int] = None):
+        self.port = port or free_port()
+        self._server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 10.0):
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Mock LLM server did not start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
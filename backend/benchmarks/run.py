@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+from benchmarks import fixtures, import_profile
+from benchmarks.mock_llm import MockLLMConfig, MockLLMServer, free_port
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SCENARIOS = ("upload", "application_enhance", "resume_enhance")
+
+# Caches would turn repeated benchmark requests into lookups; measure the full path instead
+APP_ENV = {
+    "OPENAI_API_KEY": "sk-benchmark",
+    "COMPLETION_CACHE_ENABLED": "false",
+    "PARSE_CACHE_ENABLED": "false",
+    "FIELD_MEMORY_ENABLED": "false"
+}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Dict:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "max": ms(ordered[-1]) if ordered else 0.0
+        }
+    }
+
+def _failed(response: httpx.Response) -> bool:
+    if response.status_code >= 400:
+        return True
+    # Some routes report failures as {"status": "error"} with a 200
+    if response.headers.get("content-type", "").startswith("application/json"):
+        body = response.json()
+        return isinstance(body, dict) and body.get("status") == "error"
+    return False
+
+async def measure(send: Callable[[], Awaitable[httpx.Response]], requests: int, concurrency: int) -> Dict:
+    """Issue `requests` calls from `concurrency` workers and summarize their latency"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                ok = not _failed(await send())
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+class AppProcess:
+    """The real FastAPI app under uvicorn in a child process, pointed at the mock LLM"""
+
+    def __init__(self, llm_url: str, port: Optional[int] = None, workers: int = 1, env: Optional[Dict] = None):
+        self.port = port or free_port()
+        self.workers = workers
+        self.env = {**os.environ, **APP_ENV, "OPENAI_API_BASE": f"{llm_url}/v1", "OLLAMA_BASE_URL": llm_url, **(env or {})}
+        if workers > 1:
+            self.env["RESUME_STORE_BACKEND"] = "sqlite"
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 30.0):
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+                   "--workers", str(self.workers), "--log-level", "warning"]
+        self._process = subprocess.Popen(command, cwd=BACKEND_DIR, env=self.env)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"App exited with code {self._process.returncode}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError("App did not become healthy")
+
+    def stop(self):
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+async def _upload(client: httpx.AsyncClient, resume: Dict) -> httpx.Response:
+    files = {"file": (resume["file_name"], resume["content"], resume["content_type"])}
+    return await client.post("/api/resume/upload", files=files)
+
+async def run_scenarios(base_url: str, args) -> List[Dict]:
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        variants = []
+        if "upload" in args.scenarios:
+            for kind in args.formats:
+                for size in args.sizes:
+                    resume = fixtures.resume_file(kind, size)
+                    variants.append(("upload", f"{kind}/{size}", len(resume["content"]), lambda r=resume: _upload(client, r)))
+
+        if "application_enhance" in args.scenarios or "resume_enhance" in args.scenarios:
+            uploaded = (await _upload(client, fixtures.resume_file("txt", "medium"))).json()
+            resume_id = uploaded["resume_id"]
+            if "application_enhance" in args.scenarios:
+                for size in args.sizes:
+                    body = {"resume_id": resume_id, "application_content": fixtures.form_dom(size), "bypass_cache": True}
+                    variants.append(("application_enhance", f"form/{size}", len(body["application_content"]),
+                                     lambda b=body: client.post("/api/application/enhance", json=b)))
+            if "resume_enhance" in args.scenarios:
+                body = {"resume_id": resume_id, "job_title": "Software Engineer", "company": "Example", "field": "Technology", "bypass_cache": True}
+                variants.append(("resume_enhance", "resume/medium", 0, lambda b=body: client.post("/api/resume/enhance", json=b)))
+
+        for scenario, variant, payload_bytes, send in variants:
+            await send()  # warm-up, not measured
+            for concurrency in args.concurrency:
+                summary = await measure(send, args.requests, concurrency)
+                results.append({"scenario": scenario, "variant": variant, "payload_bytes": payload_bytes, "concurrency": concurrency, **summary})
+                print(f"{scenario:20} {variant:14} c={concurrency:<3} {summary['throughput_rps']:8.2f} req/s  "
+                      f"p50={summary['latency_ms']['p50']:8.1f}ms  p95={summary['latency_ms']['p95']:8.1f}ms  "
+                      f"p99={summary['latency_ms']['p99']:8.1f}ms  errors={summary['errors']}")
+    return results
+
+def compare(current: List[Dict], baseline_path: Path):
+    """Print p50/p95 and throughput changes against a previous results file"""
+    baseline = {(r["scenario"], r["variant"], r["concurrency"]): r for r in json.loads(baseline_path.read_text())["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in current:
+        old = baseline.get((result["scenario"], result["variant"], result["concurrency"]))
+        if old is None:
+            continue
+        change = lambda new, prev: f"{(new - prev) / prev * 100:+6.1f}%" if prev else "   n/a"
+        print(f"{result['scenario']:20} {result['variant']:14} c={result['concurrency']:<3} "
+              f"p50 {change(result['latency_ms']['p50'], old['latency_ms']['p50'])}  "
+              f"p95 {change(result['latency_ms']['p95'], old['latency_ms']['p95'])}  "
+              f"throughput {change(result['throughput_rps'], old['throughput_rps'])}")
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def _csv(cast):
+    return lambda value: [cast(part) for part in value.split(",") if part]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against a local mock LLM")
+    parser.add_argument("--scenarios", type=_csv(str), default=list(SCENARIOS))
+    parser.add_argument("--formats", type=_csv(str), default=["txt", "docx", "pdf"])
+    parser.add_argument("--sizes", type=_csv(str), default=["small", "medium", "large"])
+    parser.add_argument("--concurrency", type=_csv(int), default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario, variant and concurrency level")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock LLM delay before the first token, seconds")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="mock LLM completion tokens per second (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app under test")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--url", help="benchmark an already running app instead of starting one")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="previous results file to diff against")
+    parser.add_argument("--import-profile", action="store_true", help="report per-module import cost of the app instead of load testing")
+    parser.add_argument("--import-top", type=int, default=15, help="rows per section of the import profile")
+    parser.add_argument("--mix", help="load test with a weighted traffic mix instead of per-scenario runs: "
+                                      "default, settings, fill, upload, or op=weight pairs (upload, settings, "
+                                      "application_enhance, application_stream, resume_enhance)")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users in a load test")
+    parser.add_argument("--duration", type=float, default=30.0, help="load test length, seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the load test's request sequence")
+    parser.add_argument("--profile-app", action="store_true", help="run the app with the request profiler on and save folded stacks per route")
+    return parser.parse_args(argv)
+
+def _save(report: Dict, output: Optional[Path], prefix: str = "") -> Path:
+    output = output or RESULTS_DIR / f"{prefix}{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, default=str))
+    print(f"\nSaved results to {output}")
+    return output
+
+def run_import_profile(args):
+    profile = import_profile.profile_imports("main", env=APP_ENV)
+    import_profile.print_report(profile, args.import_top)
+    _save({"created_at": datetime.now().isoformat(timespec="seconds"), "commit": _git_commit(),
+           "python": platform.python_version(), "import_profile": profile}, args.output, "imports-")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text()).get("import_profile")
+        if baseline:
+            import_profile.compare(profile, baseline, args.import_top)
+        else:
+            print(f"{args.compare} has no import profile to compare with")
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.import_profile:
+        return run_import_profile(args)
+    from benchmarks import load  # imports this module
+    mix = load.parse_mix(args.mix) if args.mix else None
+    llm_config = MockLLMConfig(latency=args.latency, token_rate=args.token_rate, completion_tokens=args.completion_tokens)
+    llm = MockLLMServer(llm_config)
+    llm.start()
+    app = None
+    profile = None
+    started = datetime.now()
+    try:
+        if not args.url:
+            app = AppProcess(llm.url, workers=args.workers, env={"PROFILING_ENABLED": "true"} if args.profile_app else None)
+            app.start()
+        base_url = args.url or app.url
+        if mix:
+            results = asyncio.run(load.run_load(base_url, args, mix))
+        else:
+            results = asyncio.run(run_scenarios(base_url, args))
+        if args.profile_app:
+            # With several workers this is the profile of whichever worker answers
+            output = args.output.with_suffix("") if args.output else RESULTS_DIR / f"profile-{started:%Y%m%d-%H%M%S}"
+            profile = load.fetch_profile(base_url, output)
+    finally:
+        if app:
+            app.stop()
+        llm.stop()
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {**{k: v for k, v in vars(args).items() if k not in ("output", "compare")}, "mock_llm": vars(llm_config)},
+        "results": results
+    }
+    if mix:
+        report["mix"] = mix
+    if profile:
+        report["profile"] = profile
+    _save(report, args.output, "load-" if mix else "")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
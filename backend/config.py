@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 import logging
 from pydantic import Field
+from typing import Dict, List
 
 load_dotenv()
 
@@ -13,6 +14,98 @@ class Settings(BaseSettings):
     openai_api_base: str = ""
     ollama_base_url: str = "http://localhost:11434"
     model: str = "gpt-4o-mini"  # Default model updated to "gpt-4o-mini"
+    ollama_model: str = "llama2"
+
+    # LLM routing: a JSON list of {"name", "type": "openai"|"ollama", "base_url", "api_key", "model"}, tried fastest-first.
+    # Empty means the OpenAI settings above (when a key is set) followed by the local Ollama instance.
+    llm_backends: List[Dict] = []
+    llm_hedge_enabled: bool = True
+    llm_hedge_delay: float = 8.0  # seconds before hedging while a backend has too few samples for a p95
+    llm_hedge_min_delay: float = 0.5
+    llm_hedge_min_samples: int = 20
+    llm_latency_window: int = 200  # recent calls kept per backend for p50/p95
+    llm_circuit_failures: int = 3  # consecutive failures that open a backend's circuit
+    llm_circuit_cooldown: float = 30.0  # seconds before a half-open trial request
+
+    # Completion cache: in-memory LRU, optionally backed by ~/.resume-filler/cache
+    completion_cache_enabled: bool = True
+    completion_cache_ttl: int = 3600  # seconds, 0 disables expiry
+    completion_cache_max_entries: int = 256
+    completion_cache_max_bytes: int = 16 * 1024 * 1024
+    completion_cache_disk: bool = False
+
+    # Async LLM client pool
+    llm_max_concurrency: int = 8  # completions in flight per worker
+    llm_timeout: float = 60.0
+    llm_connect_timeout: float = 10.0
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry: float = 30.0
+    llm_log_sample_rate: float = 0.0  # fraction of LLM calls whose full prompt and response are logged
+    llm_json_schema_mode: bool = True  # structured output as a strict json_schema; off falls back to json_object
+    llm_stream_usage: bool = True  # ask for a final usage chunk when streaming; turn off for servers that reject stream_options
+
+    # Prompt layout: stable instructions + resume prefix first, per-application content last
+    prompt_token_budget: int = 12000  # 0 disables truncation
+    prompt_resume_share: float = 0.5  # fraction of the budget reserved for instructions, resume and settings
+    prompt_tokenizer: str = "cl100k_base"  # used when tiktoken is installed, otherwise ~4 chars per token
+
+    # Long resumes: send only the chunks relevant to the form (BM25; scored with NumPy when installed)
+    retrieval_enabled: bool = True
+    retrieval_min_tokens: int = 1500  # shorter resumes are sent whole so the prompt prefix stays cacheable
+    retrieval_chunk_tokens: int = 120
+    retrieval_top_k: int = 3  # chunks per form field
+    retrieval_max_share: float = 0.8  # send the whole resume if the excerpt would be at least this fraction of it
+
+    # Upload parse cache keyed by SHA-256 of the file bytes
+    parse_cache_enabled: bool = True
+    parse_cache_max_entries: int = 128
+    parse_cache_max_bytes: int = 32 * 1024 * 1024  # memory budget for cached text + sections
+    parse_cache_disk: bool = False
+
+    # Batch application filling
+    batch_max_forms: int = 25
+    batch_max_parallel: int = 4
+
+    # Background enhancement jobs
+    job_workers: int = 4
+    job_max_per_client: int = 2  # running jobs per client; 0 disables the fairness limit
+    job_max_queued: int = 500
+    job_result_ttl: int = 3600  # seconds finished jobs stay available for polling
+
+    # Remembered per-field answers, scoped to one resume + settings combination
+    field_memory_enabled: bool = True
+    field_memory_max_scopes: int = 256
+    field_memory_ttl: int = 7 * 24 * 3600
+
+    # Uploads are spooled by the multipart parser and rejected with 413 past this size
+    max_upload_bytes: int = 10 * 1024 * 1024
+    upload_chunk_size: int = 64 * 1024
+
+    # Document extraction process pool (0 workers runs extraction in the threadpool instead)
+    extraction_workers: int = 2
+    extraction_timeout: float = 30.0  # seconds per document
+    extraction_max_pages: int = 20
+    extraction_max_chars: int = 200_000
+    extraction_parallel_min_pages: int = 8  # PDFs at least this long are split across workers (0 disables)
+    extraction_pages_per_task: int = 4
+
+    # Import document parsers and the LLM SDK in the background after startup (off: load on first use)
+    preload_dependencies: bool = True
+
+    # Resume sessions: "memory" (single worker) or "sqlite" (shared across uvicorn workers)
+    resume_store_backend: str = "memory"
+    resume_store_path: str = ""  # defaults to ~/.resume-filler/resumes.db
+    resume_store_max_entries: int = 1000
+    resume_store_ttl: int = 7 * 24 * 3600  # seconds since last access
+    # Requests without a resume_id use the most recent upload (the single-user desktop app); never with the shared sqlite store
+    resume_latest_fallback: bool = True
+
+    # Sampling profiler for live requests, exported as folded stacks per route under /debug/profile (off by default)
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 1.0  # fraction of requests profiled
+    profiling_interval: float = 0.005  # seconds between stack samples while a profiled request is in flight
+    profiling_max_stacks: int = 5000  # distinct stacks kept per route; the rest are merged
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8')
 
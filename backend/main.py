@@ -1,10 +1,44 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from routes import resume, application, settings  # Removed system
+from starlette.concurrency import run_in_threadpool
+from routes import resume, application, settings, profiling  # Removed system
+from services.core_service import core_service
+from services.extraction_service import extraction_executor
+from services.file_service import file_service
+from services.job_queue import job_queue
 from config import settings as cfg
+from middleware import ProfilingMiddleware, TimingMiddleware, UploadLimitMiddleware, label_route
+from responses import FastJSONResponse
+from services.metrics_service import metrics
+from services.profiling_service import profiler
 
-app = FastAPI(title=cfg.app_name)
+def _preload():
+    try:
+        file_service.preload()
+        core_service.preload()
+    except Exception as e:
+        logging.warning(f"Background preload failed, loading on first use instead: {e}")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    core_service.startup()
+    # Parsers and the OpenAI SDK load lazily; warm them in the background so the first upload or fill does not pay for it
+    preload = asyncio.create_task(run_in_threadpool(_preload)) if cfg.preload_dependencies else None
+    yield
+    if preload is not None:
+        preload.cancel()
+    await job_queue.aclose()
+    await core_service.aclose()  # Release pooled LLM connections
+    extraction_executor.shutdown()
+
+app = FastAPI(title=cfg.app_name, lifespan=lifespan, default_response_class=FastJSONResponse, dependencies=[Depends(label_route)])
+
+# Registered before CORSMiddleware so CORS wraps it and its 413s carry Access-Control-Allow-Origin
+app.add_middleware(UploadLimitMiddleware, max_bytes=cfg.max_upload_bytes, paths=["/api/resume/upload"])
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # For testing only, tighten this in production
@@ -13,11 +47,21 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+app.add_middleware(TimingMiddleware)  # added after the others so it is outermost (bar the profiler) and times everything
+if cfg.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, exclude=["/debug/profile", "/metrics", "/health"])
+    profiler.install()  # charges threadpool work to the request that handed it off
 
 app.include_router(resume.router)
 app.include_router(application.router)
 app.include_router(settings.router)  # Keep for API Key/Ollama settings
+if cfg.profiling_enabled:
+    app.include_router(profiling.router)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
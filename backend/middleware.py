@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+from typing import Iterable
+from starlette.requests import Request
+from services.metrics_service import REQUEST_SECONDS, current_route
+from services.profiling_service import SamplingProfiler
+
+# Room for multipart boundaries and the small form fields sent alongside the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadLimitMiddleware:
+    """Rejects oversized request bodies on upload routes with a 413 before they are buffered"""
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_body = max_bytes + MULTIPART_OVERHEAD
+        self.max_bytes = max_bytes
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH") or not scope["path"].startswith(self.paths):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body:
+            return await self._reject(send)
+
+        # Chunked bodies have no Content-Length: count bytes as the multipart parser pulls them
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    exceeded = True
+                    raise ValueError("Upload exceeds the maximum allowed size")
+            return message
+
+        response_started = False
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded and not response_started:
+                response_started = True
+                return await self._reject(send)
+            if exceeded:
+                return
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+            if not response_started:
+                await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Upload exceeds the maximum size of {self.max_bytes} bytes"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+async def label_route(request: Request):
+    """App-wide dependency: label stage and LLM metrics with the matched route template, as REQUEST_SECONDS is,
+    instead of the raw path, which would add a series per resume or job ID. Async so it runs in the request's task
+    and the label carries into the endpoint, threadpool calls and streamed bodies."""
+    route = getattr(request.scope.get("route"), "path", None)
+    if route:
+        current_route.set(route)
+
+class TimingMiddleware:
+    """Records request latency per route template and status, including time spent streaming the body"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        # Until label_route runs after routing; unmatched paths never get further, and share one label like REQUEST_SECONDS
+        token = current_route.set("unmatched")
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            current_route.reset(token)
+            # The router stores the matched route in the scope; unmatched paths share one label to bound cardinality
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"], route=route, status=str(status))
+
+class ProfilingMiddleware:
+    """Profiles a sample of requests with the sampling profiler; added outermost so the other middlewares show up in the stacks"""
+
+    def __init__(self, app, profiler: SamplingProfiler, exclude: Iterable[str] = ()):
+        self.app = app
+        self.profiler = profiler
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude) or not self.profiler.should_sample():
+            return await self.app(scope, receive, send)
+
+        record, token = self.profiler.begin(asyncio.current_task())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.profiler.end(record, token, f"{scope['method']} {route}")
@@ -0,0 +1,146 @@
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+from services.text_analysis import SECTION_HEADERS, WORDS_PER_MINUTE, TextAnalysis, analyze_text, clean_text, create_summary, keyword_coverage, normalize_newlines
+
+# Section names are stored as indexes into this tuple
+SECTION_NAMES = ("other",) + SECTION_HEADERS
+_SECTION_INDEX = {name: i for i, name in enumerate(SECTION_NAMES)}
+SETTING_FIELDS = ("enhancement_focus", "industry_focus", "target_keywords", "company_culture", "additional_info")
+
+class ParsedResume:
+    """Sections as (section, start, end) offsets into the resume text, packed into one int array.
+
+    text is the same string the session keeps as its content, so parsing adds no second copy of it;
+    section text is cleaned from its slice when asked for.
+    """
+    __slots__ = ("text", "spans", "word_count", "sentence_count", "_summary")
+
+    def __init__(self, text: str, spans: Iterable[int], word_count: int = 0, sentence_count: int = 1):
+        self.text = text
+        self.spans = array('I', spans)  # flat triples: section index, start, end
+        self.word_count = word_count
+        self.sentence_count = sentence_count
+        self._summary: Optional[str] = None
+
+    @classmethod
+    def from_analysis(cls, analysis: TextAnalysis, source: str) -> "ParsedResume":
+        """source is the newline-normalized text the analysis was fed"""
+        spans = (value for name, start, end in analysis.source_spans for value in (_SECTION_INDEX[name], start, end))
+        return cls(source, spans, analysis.word_count, analysis.sentence_count)
+
+    @classmethod
+    def parse(cls, text: str) -> "ParsedResume":
+        source = normalize_newlines(text)
+        return cls.from_analysis(analyze_text(source), source)
+
+    @property
+    def sections(self) -> Dict[str, str]:
+        # Later sections with the same header replace earlier ones, as the old parser did
+        spans = self.spans
+        return {SECTION_NAMES[spans[i]]: clean_text(self.text[spans[i + 1]:spans[i + 2]]) for i in range(0, len(spans), 3)}
+
+    @property
+    def summary(self) -> str:
+        # Depends on the text alone, and a parsed resume is shared by every settings revision of its session
+        if self._summary is None:
+            self._summary = create_summary(self.sections)
+        return self._summary
+
+    def metadata(self) -> Dict:
+        return {
+            "word_count": self.word_count,
+            "sentence_count": self.sentence_count,
+            "estimated_read_time": self.word_count // WORDS_PER_MINUTE
+        }
+
+    def to_response(self) -> Dict:
+        return {"parsed_sections": self.sections, "summary": self.summary, "metadata": self.metadata()}
+
+    def to_dict(self) -> Dict:
+        """Compact JSON form for the parse cache and the SQLite store; the text is stored alongside, not in it"""
+        return {"spans": self.spans.tolist(), "word_count": self.word_count, "sentence_count": self.sentence_count}
+
+    @classmethod
+    def from_dict(cls, data: Dict, text: str) -> "ParsedResume":
+        return cls(text, data["spans"], data.get("word_count", 0), data.get("sentence_count", 1))
+
+class StoredResume:
+    """One uploaded resume session: the raw extracted content, its parsed form and the fill settings"""
+    __slots__ = ("resume_id", "content", "file_name", "file_type", "parsed", "_coverage") + SETTING_FIELDS
+
+    def __init__(self, content: str, file_name: str, file_type: Optional[str], parsed: ParsedResume, resume_id: Optional[str] = None,
+                 enhancement_focus: Optional[str] = "Clarity & Conciseness", industry_focus: Optional[str] = "Technology",
+                 target_keywords: Optional[str] = "", company_culture: Optional[str] = "", additional_info: Optional[Dict] = None):
+        if parsed.text == content:
+            parsed.text = content  # share one string even if the caller built two equal ones
+        self.resume_id = resume_id
+        self.content = content
+        self.file_name = file_name
+        self.file_type = file_type
+        self.parsed = parsed
+        self.enhancement_focus = enhancement_focus
+        self.industry_focus = industry_focus
+        self.target_keywords = target_keywords
+        self.company_culture = company_culture
+        self.additional_info = additional_info or {}
+        self._coverage: Optional[Tuple[str, Dict]] = None  # (target_keywords, coverage) it was computed for
+
+    def settings(self) -> Dict:
+        return {name: getattr(self, name) for name in SETTING_FIELDS}
+
+    def with_changes(self, changes: Dict) -> "StoredResume":
+        """A copy with new settings; the content and everything parsed from it are shared, not recomputed"""
+        record = StoredResume(self.content, self.file_name, self.file_type, self.parsed, self.resume_id, **self.settings())
+        record._coverage = self._coverage
+        for name, value in changes.items():
+            if name not in SETTING_FIELDS:
+                raise ValueError(f"Unknown resume setting: {name}")
+            setattr(record, name, value if value is not None or name != "additional_info" else {})
+        if "target_keywords" in changes:
+            record.keyword_coverage()  # the only derived value that depends on a setting
+        return record
+
+    def keyword_coverage(self) -> Dict:
+        keywords = self.target_keywords or ""
+        if self._coverage is None or self._coverage[0] != keywords:
+            self._coverage = (keywords, keyword_coverage(self.content, keywords))
+        return self._coverage[1]
+
+    def to_response(self) -> Dict:
+        """The flat record /last_upload has always returned"""
+        return {
+            "status": "success",
+            "resume_id": self.resume_id,
+            "content": self.content,
+            "file_name": self.file_name,
+            "file_type": self.file_type,
+            **self.parsed.to_response(),
+            **self.settings()
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "resume_id": self.resume_id,
+            "content": self.content,
+            "file_name": self.file_name,
+            "file_type": self.file_type,
+            "parsed": self.parsed.to_dict(),
+            # Only when the content had carriage returns the offsets could not point into
+            "parsed_text": None if self.parsed.text is self.content else self.parsed.text,
+            "keyword_coverage": list(self._coverage) if self._coverage else None,
+            **self.settings()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "StoredResume":
+        content = data.get("content") or ""
+        if data.get("parsed") is None:
+            # Rows written before the compact format held parsed_sections and summary copies; re-derive from the content
+            parsed = ParsedResume.parse(content)
+        else:
+            parsed = ParsedResume.from_dict(data["parsed"], data.get("parsed_text") or content)
+        record = cls(content, data.get("file_name"), data.get("file_type"), parsed, data.get("resume_id"),
+                     **{name: data.get(name) for name in SETTING_FIELDS})
+        if data.get("keyword_coverage"):
+            record._coverage = tuple(data["keyword_coverage"])
+        return record
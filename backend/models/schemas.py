@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 class Resume(BaseModel):
     content: str
@@ -15,7 +15,9 @@ class EnhanceRequest(BaseModel):
     job_title: str
     company: str
     field: str
-    resume_content: str
+    resume_content: Optional[str] = ""
+    resume_id: Optional[str] = None
+    bypass_cache: Optional[bool] = False
 
 class AIConfig(BaseModel):
     api_key: Optional[str] = None
@@ -26,4 +28,12 @@ class AIConfig(BaseModel):
 
 class EnhanceResponse(BaseModel):
     enhanced_content: str
-    original_content: str
\ No newline at end of file
+    original_content: str
+
+class FormField(BaseModel):
+    field: str
+    value: str
+    selector: Optional[str] = None
+
+class FormFillResponse(BaseModel):
+    fields: List[FormField]
@@ -0,0 +1,15 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # optional: several times faster encoding of large resume payloads
+except ImportError:
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -1,59 +1,257 @@
-from typing import Optional
-from fastapi import APIRouter, HTTPException
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.core_service import core_service
+from models.schemas import FormField
+from services.cache_service import make_key
+from services.core_service import ResumeIdRequired, core_service
+from services.field_parser import FieldStreamParser, parse_field_line, parse_fields
+from services.dom_service import DomSummary, build_manifest, minimize_dom, passthrough
+from services.field_memory import field_memory, format_known
+from services.job_queue import QueueFull, job_queue
+from services.metrics_service import span
+from services.prompt_builder import PromptBuild, PromptPrefix, application_prefix
+from services.retrieval import field_query, resume_retriever
+from services.structured_output import FORM_FILL_JSON_SCHEMA, JsonFieldStreamParser, format_field_lines, parse_form_fill
+from config import settings
+import json
 import logging
 
 router = APIRouter(prefix="/api/application", tags=["application"])
 
-class EnhanceApplicationRequest(BaseModel):
-    enhancement_focus: str
-    resume_content: str
-    application_content: str
-    industry_focus: str
-    target_keywords: str
-    company_culture: str
+class ApplicationResumeContext(BaseModel):
+    # Either a resume_id from /api/resume/upload or the full resume_content; settings left unset come from the stored resume
+    resume_id: Optional[str] = None
+    resume_content: Optional[str] = None
+    enhancement_focus: Optional[str] = None
+    industry_focus: Optional[str] = None
+    target_keywords: Optional[str] = None
+    company_culture: Optional[str] = None
     additional_info: Optional[dict] = None
+    bypass_cache: bool = False
+    minimize_dom: bool = True  # send a compact manifest of the form controls instead of the raw DOM
+    structured_output: bool = False  # ask the model for JSON matching FormFillResponse instead of text lines
+
+class EnhanceApplicationRequest(ApplicationResumeContext):
+    application_content: str
+
+class EnhanceApplicationJobRequest(EnhanceApplicationRequest):
+    priority: int = 0  # higher runs sooner
+
+class ApplicationForm(BaseModel):
+    application_content: str
+    id: Optional[str] = None  # echoed back so clients can match results to their queue
+
+class BatchEnhanceApplicationRequest(ApplicationResumeContext):
+    forms: List[ApplicationForm]
+    max_parallel: Optional[int] = None
+    stream: bool = False
+
+_RESUME_SETTINGS = ("enhancement_focus", "industry_focus", "target_keywords", "company_culture", "additional_info")
+
+async def _resolve_resume(request: ApplicationResumeContext) -> ApplicationResumeContext:
+    updates = {}
+    if request.resume_id or not request.resume_content:
+        try:
+            stored = await core_service.load_resume(request.resume_id)
+        except ResumeIdRequired as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        updates["resume_content"] = stored.content
+        updates.update({key: getattr(stored, key) for key in _RESUME_SETTINGS if getattr(request, key) is None})
+    resolved = request.model_copy(update=updates)
+    for key in _RESUME_SETTINGS[:-1]:
+        if getattr(resolved, key) is None:
+            setattr(resolved, key, "")
+    return resolved
+
+def _application_prefix(context: ApplicationResumeContext, resume_content: Optional[str] = None) -> PromptPrefix:
+    """Form-independent prompt prefix, built once per request or batch"""
+    with span("prompt_build"):
+        return application_prefix(resume_content or context.resume_content, {key: getattr(context, key) for key in _RESUME_SETTINGS},
+                                  context.structured_output)
+
+def _prepare_dom(context: ApplicationResumeContext, application_content: str) -> DomSummary:
+    with span("dom_minimize"):
+        return minimize_dom(application_content) if context.minimize_dom else passthrough(application_content)
+
+@dataclass
+class _FillPlan:
+    dom: DomSummary
+    prompt: Optional[PromptBuild]  # None when every field was answered from memory
+    known_lines: List[str]
+    scope: str
+    structured: bool = False
+    usage: Dict = field(default_factory=dict)
+    retrieval: Optional[Dict] = None  # set when only the resume chunks relevant to this form were sent
+    fields: List[FormField] = field(default_factory=list)
+    repair: Optional[Dict] = None  # structured mode only: whether the JSON had to be fixed up locally
+
+    @property
+    def json_schema(self) -> Optional[Dict]:
+        return FORM_FILL_JSON_SCHEMA if self.structured else None
+
+    def metadata(self) -> dict:
+        return {
+            "dom": self.dom.metadata(),
+            "memoized_fields": len(self.known_lines),
+            "prompt": self.prompt.metadata() if self.prompt else None,
+            "usage": self.usage or None,
+            "retrieval": self.retrieval,
+            "structured_output": self.repair
+        }
+
+    def finish(self, completion: str) -> str:
+        with span("response_parse"):
+            trusted = True
+            if self.structured and completion:
+                parsed = parse_form_fill(completion)
+                self.repair = {"repaired": parsed.repaired, "dropped": parsed.dropped}
+                trusted = not parsed.repaired
+                completion = format_field_lines(parsed.fields)
+            # Drop any remembered field the model answered again anyway
+            known_selectors = {parse_field_line(line)["selector"] for line in self.known_lines} - {None}
+            lines = [line for line in completion.splitlines() if (parse_field_line(line) or {}).get("selector") not in known_selectors]
+            if trusted:
+                # JSON that had to be fixed up or salvaged may hold mangled values; those are returned but not remembered
+                field_memory.remember(self.scope, self.dom.fields, "\n".join(lines))
+            content = "\n".join(self.known_lines + lines)
+            self.fields = [FormField(**parsed) for parsed in parse_fields(content)]
+            return content
+
+    def response(self, content: str) -> dict:
+        return {"enhanced_content": content, "fields": [item.model_dump() for item in self.fields], "metadata": self.metadata()}
+
+def _plan_fill(context: ApplicationResumeContext, prefix: PromptPrefix, application_content: str) -> _FillPlan:
+    """Answer remembered fields directly and only prompt the LLM for the rest"""
+    dom = _prepare_dom(context, application_content)
+    scope = field_memory.scope(context.resume_content, {key: getattr(context, key) for key in _RESUME_SETTINGS})
+    known, unknown = field_memory.split(scope, dom.fields) if dom.fields and not context.bypass_cache else ([], dom.fields)
+    prompt, retrieval = None, None
+    if unknown or not dom.fields:
+        with span("retrieval"):
+            excerpt = resume_retriever.excerpt(context.resume_content, [field_query(control) for control in unknown])
+        if excerpt is not None:
+            # Long resume: this form gets its own prefix holding just the relevant chunks
+            prefix, retrieval = _application_prefix(context, excerpt.text), excerpt.metadata()
+        with span("prompt_build"):
+            prompt = prefix.build(build_manifest(unknown) if known else dom.manifest)
+    return _FillPlan(dom, prompt, format_known(known), scope, context.structured_output, retrieval=retrieval)
+
+async def _complete(plan: _FillPlan, use_cache: bool) -> str:
+    if not plan.prompt:
+        return ""
+    completion = await core_service.complete(plan.prompt.messages, use_cache=use_cache, json_schema=plan.json_schema)
+    plan.usage = completion.usage
+    return completion.content
+
+async def _enhance(context: EnhanceApplicationRequest) -> dict:
+    plan = _plan_fill(context, _application_prefix(context), context.application_content)
+    enhanced_content = plan.finish(await _complete(plan, use_cache=not context.bypass_cache))
+    return {"status": "success", **plan.response(enhanced_content)}
 
 @router.post("/enhance")
-def enhance_application(request: EnhanceApplicationRequest):
+async def enhance_application(request: EnhanceApplicationRequest):
     try:
         logging.info("Received enhancement request")
-        additional_info_str = ""
-        if request.additional_info and isinstance(request.additional_info, dict):
-            additional_info_str = "\nAdditional Information:\n" + "\n".join(f"- {k}: {v}" for k, v in request.additional_info.items())
-
-        prompt = f"""
-        You are a professional resume writer tasked with auto-filling a job application form based on a user's resume. Below is the information provided:
-
-        Resume Content:
-        {request.resume_content}
-
-        Scraped Job Application Form DOM Content:
-        {request.application_content}
-
-        Enhancement Focus: {request.enhancement_focus}
-        Industry Focus: {request.industry_focus}
-        Target Keywords: {request.target_keywords}
-        Company Culture Notes: {request.company_culture}
-        {additional_info_str}
-
-        Instructions:
-        1. Analyze the DOM content to identify all fields requiring auto-completion (e.g., personal information, education, skills, experience, additional questions).
-        2. Use 'placeholder' attributes (e.g., 'Enter your full name') or 'name' attributes to infer field purposes.
-        3. Generate truthful responses derived from the resume content, tailored to the enhancement focus:
-           - For "Clarity & Conciseness": Provide short, clear answers.
-           - For "Professional Tone": Use formal language and structure.
-           - For "Keywords Optimization": Incorporate the target keywords naturally.
-           - For "Impact & Achievement Focus": Highlight results and accomplishments.
-        4. Align responses with the industry focus and reflect the company culture notes where relevant.
-        5. Incorporate any additional information provided to enhance specific fields, such as 'Current GPA' if provided in Additional Information.
-        6. Suggest a DOM selector for each field (e.g., 'input[placeholder="Enter your full name"]', 'textarea[name="experience"]') based on the DOM structure. If no clear selector is identifiable, omit it.
-        7. Return the results in plain text format, one field per line, as 'Field: Value [Selector]' (omit [Selector] if not applicable). Do not include extra explanations or formatting.
-        """
-        enhanced_content = core_service.generate_openai_response(prompt)
-        
-        return {"status": "success", "enhanced_content": enhanced_content}
+        return await _enhance(await _resolve_resume(request))
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in enhance_application: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _client_id(http_request: Request) -> str:
+    # No accounts here, so fairness is per X-Client-Id header (the extension can send one) or per address
+    return http_request.headers.get("x-client-id") or (http_request.client.host if http_request.client else "anonymous")
+
+@router.post("/jobs", status_code=202)
+async def submit_enhance_job(request: EnhanceApplicationJobRequest, http_request: Request):
+    """Queue an enhancement and return its job ID at once; poll GET /jobs/{job_id} for the result"""
+    context = await _resolve_resume(request)  # an unknown resume_id fails now rather than inside the job
+    key = make_key("application_enhance", context.model_dump(exclude={"priority"}))
+    try:
+        job, deduplicated = await job_queue.submit(key, lambda: _enhance(context), client=_client_id(http_request),
+                                                   priority=request.priority, kind="application_enhance")
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    logging.info(f"Queued enhancement job {job.id} (deduplicated={deduplicated})")
+    return {"status": job.status, "job_id": job.id, "deduplicated": deduplicated}
+
+@router.get("/jobs/{job_id}")
+async def get_enhance_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or its result has expired")
+    return job
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/enhance/stream")
+async def stream_enhance_application(request: EnhanceApplicationRequest):
+    """Server-sent events: one 'field' event per completed line (or JSON field object in structured mode), then 'done'"""
+    logging.info("Received streaming enhancement request")
+    context = await _resolve_resume(request)
+    plan = _plan_fill(context, _application_prefix(context), request.application_content)
+
+    async def events():
+        parser = JsonFieldStreamParser() if plan.structured else FieldStreamParser()
+        try:
+            # Remembered answers are available before the model produces its first token
+            for line in plan.known_lines:
+                yield _sse("field", parse_field_line(line))
+            if plan.prompt:
+                async for delta in core_service.stream_response(plan.prompt.messages, use_cache=not request.bypass_cache, usage=plan.usage,
+                                                                json_schema=plan.json_schema):
+                    for parsed in parser.feed(delta):
+                        yield _sse("field", parsed)
+                for parsed in parser.close():
+                    yield _sse("field", parsed)
+                logging.info(f"LLM usage: {plan.usage}")
+            enhanced_content = plan.finish(parser.text.strip())
+            yield _sse("done", {"status": "success", **plan.response(enhanced_content)})
+        except Exception as e:
+            logging.error(f"Error in stream_enhance_application: {str(e)}")
+            yield _sse("error", {"status": "error", "message": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/enhance/batch")
+async def enhance_application_batch(request: BatchEnhanceApplicationRequest):
+    """Fill many forms for one resume; results come back in order, or as NDJSON lines as they finish when stream is set"""
+    if len(request.forms) > settings.batch_max_forms:
+        raise HTTPException(status_code=413, detail=f"A batch may contain at most {settings.batch_max_forms} forms")
+    logging.info(f"Received batch enhancement request with {len(request.forms)} forms")
+    context = await _resolve_resume(request)
+    prefix = _application_prefix(context)
+    parallel = max(1, min(request.max_parallel or settings.batch_max_parallel, settings.batch_max_parallel))
+    slots = asyncio.Semaphore(parallel)
+
+    async def fill(index: int, form: ApplicationForm) -> dict:
+        result = {"index": index, "id": form.id}
+        try:
+            plan = _plan_fill(context, prefix, form.application_content)
+            async with slots:
+                completion = await _complete(plan, use_cache=not request.bypass_cache)
+            return {**result, "status": "success", **plan.response(plan.finish(completion))}
+        except Exception as e:
+            logging.error(f"Error in batch item {index}: {str(e)}")
+            return {**result, "status": "error", "message": str(e)}
+
+    tasks = [asyncio.create_task(fill(i, form)) for i, form in enumerate(request.forms)]
+    if not request.stream:
+        return {"status": "success", "results": await asyncio.gather(*tasks)}
+
+    async def lines():
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
\ No newline at end of file
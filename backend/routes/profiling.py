@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from services.profiling_service import profiler
+
+# Only mounted when PROFILING_ENABLED is set
+router = APIRouter(prefix="/debug/profile", tags=["profiling"])
+
+@router.get("")
+def profile_summary(top: int = 10):
+    return profiler.stats(top)
+
+@router.get("/folded", response_class=PlainTextResponse)
+def profile_folded(route: Optional[str] = None):
+    """Folded stacks for flamegraph.pl, inferno or speedscope; ?route=POST /api/application/enhance for one route"""
+    return PlainTextResponse(profiler.folded(route))
+
+@router.delete("")
+def reset_profile():
+    profiler.reset()
+    return {"status": "success"}
@@ -1,14 +1,28 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from pydantic import BaseModel
+from models.resume import ParsedResume, StoredResume
 from models.schemas import Resume, EnhanceRequest, AIConfig
-from services.core_service import core_service
+from responses import FastJSONResponse
+from services.config_service import ConfigApplyError, config_service
+from services.core_service import ResumeIdRequired, core_service
 from services.file_service import file_service
-import io
-from typing import Optional, Dict
+from services.extraction_service import extraction_executor
+from services.metrics_service import span
+from typing import Optional, Dict, Tuple
+from config import settings
+import hashlib
 import json
 
 router = APIRouter(prefix="/api/resume", tags=["resume"])
 
+class ResumeSettingsUpdate(BaseModel):
+    """Only the fields that are sent are changed"""
+    enhancement_focus: Optional[str] = None
+    industry_focus: Optional[str] = None
+    target_keywords: Optional[str] = None
+    company_culture: Optional[str] = None
+    additional_info: Optional[Dict[str, str]] = None
+
 class ResumeUploadRequest(BaseModel):
     enhancement_focus: str
     industry_focus: str
@@ -17,7 +31,7 @@ class ResumeUploadRequest(BaseModel):
     additional_info: Optional[Dict[str, str]] = None
 
 @router.post("/upload")
-def upload_resume(
+async def upload_resume(
     file: UploadFile = File(...),
     enhancement_focus: str = Form(default="Clarity & Conciseness"),
     industry_focus: str = Form(default="Technology"),
@@ -26,14 +40,12 @@ def upload_resume(
     additional_info: str = Form(default="{}")  # JSON string for additional_info
 ):
     try:
-        content = file.file.read()
-        if file.content_type == 'application/pdf' or file.filename.endswith('.pdf'):
-            text_content = file_service._read_pdf_from_bytes(io.BytesIO(content))
-        elif file.content_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' or file.filename.endswith('.docx'):
-            text_content = file_service._read_docx_from_bytes(io.BytesIO(content))
-        else:
-            text_content = content.decode()
-        parsed_data = file_service.parse_resume(text_content)
+        content, digest = await _read_upload(file)
+        kind = file_service.detect_file_kind(file.filename, file.content_type)
+        with span("upload_parse"):
+            upload = await extraction_executor.parse_upload(content, kind, digest)
+        text_content = upload["text"]
+        parsed = ParsedResume.from_dict(upload["parsed"], text_content)
 
         # Parse additional_info from JSON string
         additional_info_dict = {}
@@ -43,7 +55,7 @@ def upload_resume(
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid JSON format for additional_info")
 
-        core_service.process_resume(
+        stored = await core_service.store_resume(
             Resume(
                 content=text_content,
                 file_name=file.filename,
@@ -53,66 +65,95 @@ def upload_resume(
                 target_keywords=target_keywords,
                 company_culture=company_culture,
                 additional_info=additional_info_dict
-            )
+            ),
+            parsed
         )
-        core_service.last_resume.update({
-            "parsed_sections": parsed_data["parsed_sections"],
-            "metadata": parsed_data["metadata"],
-            "enhancement_focus": enhancement_focus,
-            "industry_focus": industry_focus,
-            "target_keywords": target_keywords,
-            "company_culture": company_culture,
-            "additional_info": additional_info_dict
-        })
-        return {
-            "status": "success",
-            "parsed_sections": parsed_data["parsed_sections"],
-            "summary": parsed_data["summary"],
-            "metadata": parsed_data["metadata"],
-            "settings": {
-                "enhancement_focus": enhancement_focus,
-                "industry_focus": industry_focus,
-                "target_keywords": target_keywords,
-                "company_culture": company_culture,
-                "additional_info": additional_info_dict
-            }
-        }
+        return FastJSONResponse({"status": "success", "resume_id": stored.resume_id, **parsed.to_response(), "settings": stored.settings()})
+    except HTTPException:
+        raise
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+async def _read_upload(file: UploadFile) -> Tuple[bytes, str]:
+    # One pass over the spooled upload: enforce the size limit, hash, and keep the bytes for extraction
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    while chunk := await file.read(settings.upload_chunk_size):
+        size += len(chunk)
+        if size > settings.max_upload_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds the maximum size of {settings.max_upload_bytes} bytes")
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+def _find_resume(resume_id: Optional[str]) -> Optional[StoredResume]:
+    try:
+        return core_service.get_resume(resume_id)
+    except ResumeIdRequired as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError:
+        return None
+
 @router.get("/upload")
-def get_last_uploaded_resume():
-    last_resume = core_service.last_resume
-    if not last_resume or "parsed_sections" not in last_resume:
+def get_last_uploaded_resume(resume_id: Optional[str] = None):
+    last_resume = _find_resume(resume_id)
+    if not last_resume:
         return {"status": "pending", "message": "No resume uploaded yet"}
-    return {
+    # Returned as a Response so it is encoded once, straight from the stored record
+    return FastJSONResponse({
         "status": "success",
-        "parsed_sections": last_resume["parsed_sections"],
-        "metadata": last_resume["metadata"],
-        "settings": {
-            "enhancement_focus": last_resume.get("enhancement_focus", "Clarity & Conciseness"),
-            "industry_focus": last_resume.get("industry_focus", "Technology"),
-            "target_keywords": last_resume.get("target_keywords", ""),
-            "company_culture": last_resume.get("company_culture", ""),
-            "additional_info": last_resume.get("additional_info", {})
-        }
-    }
+        "resume_id": last_resume.resume_id,
+        "parsed_sections": last_resume.parsed.sections,
+        "metadata": last_resume.parsed.metadata(),
+        "settings": last_resume.settings(),
+        "keyword_coverage": last_resume.keyword_coverage()
+    })
 
 @router.get("/last_upload")
-def get_last_upload():
-    last_resume = core_service.last_resume
+def get_last_upload(resume_id: Optional[str] = None):
+    last_resume = _find_resume(resume_id)
     if not last_resume:
         return {"status": "pending", "message": "No resume uploaded yet"}
-    return last_resume
+    return FastJSONResponse(last_resume.to_response())
+
+@router.patch("/settings")
+def update_resume_settings(update: ResumeSettingsUpdate, resume_id: Optional[str] = None):
+    """Change the fill settings of an uploaded resume without uploading it again"""
+    try:
+        with span("resume_settings"):
+            stored = core_service.update_resume_settings(resume_id, update.model_dump(exclude_unset=True))
+    except ResumeIdRequired as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return FastJSONResponse({
+        "status": "success",
+        "resume_id": stored.resume_id,
+        "settings": stored.settings(),
+        "keyword_coverage": stored.keyword_coverage()
+    })
 
 @router.post("/enhance")
-def enhance_resume(request: EnhanceRequest):
-    return core_service.enhance_resume(request)
+async def enhance_resume(request: EnhanceRequest):
+    try:
+        completion = await core_service.enhance_resume(request)
+        return completion.content
+    except ResumeIdRequired as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 @router.post("/ai-config")
 def update_ai_config(config: AIConfig):
     if config.api_key:
-        core_service.init_openai(config.api_key, config.endpoint)
+        updates = {"api_key": config.api_key}
+        if config.endpoint is not None:
+            updates["api_base"] = config.endpoint  # an omitted endpoint keeps the saved one
+        try:
+            config_service.update_many(updates)
+        except ConfigApplyError as e:
+            raise HTTPException(status_code=400, detail=f"Settings saved but not applied: {str(e)}")
     return {"status": "success"}
 
 class FilePathRequest(BaseModel):
@@ -122,23 +163,15 @@ class FilePathRequest(BaseModel):
 def read_resume_from_path(request: FilePathRequest):
     try:
         text_content = file_service.read_file_content(request.file_path)
-        parsed_data = file_service.parse_resume(text_content)
-        core_service.process_resume(
+        parsed = file_service.parse_resume(text_content)
+        stored = core_service.process_resume(
             Resume(
                 content=text_content,
                 file_name=request.file_path,
                 file_type=request.file_path.split('.')[-1]
-            )
+            ),
+            parsed
         )
-        core_service.last_resume.update({
-            "parsed_sections": parsed_data["parsed_sections"],
-            "metadata": parsed_data["metadata"]
-        })
-        return {
-            "status": "success",
-            "parsed_sections": parsed_data["parsed_sections"],
-            "summary": parsed_data["summary"],
-            "metadata": parsed_data["metadata"]
-        }
+        return {"status": "success", "resume_id": stored.resume_id, **parsed.to_response()}
     except Exception as e:
         return {"status": "error", "message": str(e)}
\ No newline at end of file
@@ -1,7 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from services.config_service import config_service
+from services.config_service import ConfigApplyError, config_service
 from services.core_service import core_service
+from services.cache_service import completion_cache, parse_cache
+from services.job_queue import job_queue
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
@@ -22,10 +24,24 @@ def get_openai_settings():
 @router.post("/openai")
 def save_openai_settings(settings: OpenAISettings):
     try:
-        config_service.update_config("api_base", settings.api_base)
-        config_service.update_config("api_key", settings.api_key)
-        config_service.update_config("model", settings.model)
-        core_service.init_openai(settings.api_key, settings.api_base)  # Reinitialize client, model handled in core_service
-        return {"status": "success"}
+        # One atomic write; core_service picks the new client settings up from the config change
+        config_service.update_many({"api_base": settings.api_base, "api_key": settings.api_key, "model": settings.model})
+    except ConfigApplyError as e:
+        raise HTTPException(status_code=400, detail=f"Settings saved but not applied: {str(e)}")
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "success"}
+
+@router.get("/llm")
+def get_llm_backends():
+    return {"status": "success", "backends": core_service.router.stats(), "jobs": job_queue.stats()}
+
+@router.get("/cache")
+def get_cache_stats():
+    return {"status": "success", "completion_cache": completion_cache.stats(), "parse_cache": parse_cache.stats()}
+
+@router.delete("/cache")
+def clear_cache():
+    completion_cache.clear()
+    parse_cache.clear()
+    return {"status": "success"}
\ No newline at end of file
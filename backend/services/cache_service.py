@@ -0,0 +1,243 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from config import settings
+
+_WHITESPACE = re.compile(r'[ \t]+')
+
+def make_key(*parts: Any) -> str:
+    """Stable SHA-256 key for any JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse indentation and blank lines so cosmetic prompt edits share a key"""
+    lines = (_WHITESPACE.sub(' ', line).strip() for line in prompt.strip().splitlines())
+    return '\n'.join(line for line in lines if line)
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return len(json.dumps(value, default=str).encode('utf-8'))
+
+class MemoryCache:
+    """LRU cache with a per-entry TTL, bounded by entry count and total size"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 0, ttl: float = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        size = _sizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+class DiskCache:
+    """JSON-file cache tier that survives restarts, one file per key"""
+
+    def __init__(self, directory: Path, ttl: float = 0, max_entries: int = 1024):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Dropping unreadable cache entry {path.name}: {e}")
+            self.delete(key)
+            return None
+        if entry.get("expires_at") and entry["expires_at"] < time.time():
+            self.delete(key)
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        entry = {"expires_at": time.time() + ttl if ttl else 0, "value": value}
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logging.warning(f"Failed to write cache entry {key}: {e}")
+            return
+        self._prune()
+
+    def delete(self, key: str):
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for path in self.directory.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+    def _prune(self):
+        files = list(self.directory.glob('*.json'))
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:len(files) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+class TieredCache:
+    """Memory LRU in front of an optional disk tier, with hit/miss counters"""
+
+    def __init__(self, memory: MemoryCache, disk: Optional[DiskCache] = None, enabled: bool = True):
+        self.memory = memory
+        self.disk = disk
+        self.enabled = enabled
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        if not self.enabled or value is None:
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def record_bypass(self):
+        self.bypasses += 1
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.memory),
+            "bytes": self.memory.size_bytes,
+            "evictions": self.memory.evictions,
+            "disk": self.disk is not None
+        }
+
+CACHE_ROOT = Path.home() / '.resume-filler' / 'cache'
+
+def _build_completion_cache() -> TieredCache:
+    memory = MemoryCache(
+        max_entries=settings.completion_cache_max_entries,
+        max_bytes=settings.completion_cache_max_bytes,
+        ttl=settings.completion_cache_ttl
+    )
+    disk = None
+    if settings.completion_cache_disk:
+        try:
+            disk = DiskCache(CACHE_ROOT / 'completions', ttl=settings.completion_cache_ttl)
+        except Exception as e:
+            logging.error(f"Completion disk cache disabled: {e}")
+    return TieredCache(memory, disk, enabled=settings.completion_cache_enabled)
+
+def _build_parse_cache() -> TieredCache:
+    memory = MemoryCache(
+        max_entries=settings.parse_cache_max_entries,
+        max_bytes=settings.parse_cache_max_bytes
+    )
+    disk = None
+    if settings.parse_cache_disk:
+        try:
+            disk = DiskCache(CACHE_ROOT / 'parsed', max_entries=settings.parse_cache_max_entries)
+        except Exception as e:
+            logging.error(f"Parse disk cache disabled: {e}")
+    return TieredCache(memory, disk, enabled=settings.parse_cache_enabled)
+
+completion_cache = _build_completion_cache()
+parse_cache = _build_parse_cache()
@@ -1,28 +1,111 @@
 import json
+import logging
 import os
+import tempfile
+import threading
 from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+class ConfigApplyError(Exception):
+    """The config was written, but a listener could not apply it"""
 
 class ConfigService:
-    def __init__(self):
-        self.config_dir = Path.home() / '.resume-filler'
+    """~/.resume-filler/config.json with an in-memory copy that is reloaded only when the file's mtime changes"""
+
+    def __init__(self, config_dir: Optional[Path] = None):
+        self.config_dir = Path(config_dir) if config_dir else Path.home() / '.resume-filler'
         self.config_file = self.config_dir / 'config.json'
+        self._lock = threading.RLock()
+        self._config: Dict = {}
+        self._mtime_ns: Optional[int] = None
+        self._listeners: List[Callable[[Dict], None]] = []
         self._ensure_config_dir()
 
     def _ensure_config_dir(self):
-        self.config_dir.mkdir(exist_ok=True)
-        if not self.config_file.exists(): self.save_config({})
+        try:
+            self.config_dir.mkdir(parents=True, exist_ok=True)
+            if not self.config_file.exists(): self.save_config({})
+        except Exception as e:
+            logging.error(f"Error creating config file: {e}")
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return self.config_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self) -> bool:
+        """Re-read the file if it changed on disk since the last read or write; returns True when it did"""
+        mtime = self._mtime()
+        if mtime == self._mtime_ns:
+            return False
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            config = {}
+        except Exception as e:
+            logging.error(f"Error loading config: {e}")
+            return False
+        self._config, self._mtime_ns = config if isinstance(config, dict) else {}, mtime
+        return True
 
     def load_config(self) -> dict:
-        try: return json.load(open(self.config_file, 'r'))
-        except Exception as e: print(f"Error loading config: {e}"); return {}
+        with self._lock:
+            changed = self._refresh()
+            config = dict(self._config)
+        if changed:
+            self._notify(config)
+        return config
 
     def save_config(self, config: dict):
-        try: json.dump(config, open(self.config_file, 'w'), indent=2)
-        except Exception as e: print(f"Error saving config: {e}")
+        with self._lock:
+            self._write(config)
+        self._notify(dict(config), strict=True)
 
     def update_config(self, key: str, value: str):
+        self.update_many({key: value})
+
+    def update_many(self, updates: Dict) -> dict:
+        """Apply several keys in one atomic write; raises ConfigApplyError if a listener rejects the result"""
+        with self._lock:
+            self._refresh()
+            config = {**self._config, **updates}
+            self._write(config)
+        self._notify(dict(config), strict=True)
+        return config
+
+    def _write(self, config: Dict):
+        # Write to a temp file in the same directory and rename over the old one so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.config_dir, prefix='.config-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2)
+            os.replace(tmp_path, self.config_file)
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._config, self._mtime_ns = dict(config), self._mtime()
+
+    def subscribe(self, listener: Callable[[Dict], None]):
+        """Call listener with the current config now and again whenever it changes"""
         config = self.load_config()
-        config[key] = value
-        self.save_config(config)
+        self._listeners.append(listener)
+        try:
+            listener(config)
+        except Exception as e:
+            logging.error(f"Failed to apply saved config: {e}")  # a bad saved setting must not stop the app starting
+
+    def _notify(self, config: Dict, strict: bool = False):
+        # Every listener runs even if one fails; saves made through the API report the failures, reloads only log them
+        errors = []
+        for listener in self._listeners:
+            try:
+                listener(config)
+            except Exception as e:
+                logging.error(f"Failed to apply config change: {e}")
+                errors.append(str(e))
+        if errors and strict:
+            raise ConfigApplyError("; ".join(errors))
 
-config_service = ConfigService()
\ No newline at end of file
+config_service = ConfigService()
@@ -1,174 +1,189 @@
-import httpx
-from openai import OpenAI, OpenAIError
+from starlette.concurrency import run_in_threadpool
 from config import settings
+from models.resume import ParsedResume, StoredResume
 from models.schemas import Resume, EnhanceRequest
-from typing import Dict, Optional
+from services.cache_service import completion_cache, make_key, normalize_prompt
+from services.config_service import config_service
+from services.llm_router import DEFAULT_OPENAI_BASE, Completion, default_backend_specs, llm_router, preload_clients, usage_dict
+from services.metrics_service import span
+from services.prompt_builder import PromptBuild, enhancement_prefix
+from services.resume_store import resume_store
+from services.retrieval import resume_retriever
+from services.text_analysis import analyze_text
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime
-import re
 import logging
 
+class ResumeIdRequired(LookupError):
+    pass
+
 class CoreService:
     def __init__(self):
-        self.openai_client = None
-        self.ollama_base_url = settings.ollama_base_url
-        self.api_base = settings.openai_api_base
-        self.last_extraction: Dict = {}
-        self.last_resume: Dict = {}
-
-        try:
-            logging.debug(f"Initializing OpenAI with key (first 4 chars): {settings.openai_api_key[:4] if settings.openai_api_key else 'None'}")
-            logging.debug(f"Using API base: {settings.openai_api_base}")
-            self.init_openai(settings.openai_api_key, settings.openai_api_base)
-            logging.info("OpenAI client initialized successfully")
-        except Exception as e:
-            logging.error(f"Failed to initialize OpenAI client: {str(e)}")
-            raise
-
-    def init_openai(self, api_key: str, api_base: str = None):
-        self.api_base = api_base or "https://api.openai.com/v1"
-        self.openai_client = OpenAI(
-            api_key=api_key,
-            base_url=self.api_base
+        self.router = llm_router
+        self._started = False
+        self._saved_openai = False  # the "openai" backend currently comes from settings saved in the UI
+
+    def startup(self):
+        """Run from the app lifespan rather than at import"""
+        if self._started:
+            return
+        self._started = True
+        config_service.subscribe(self.apply_config)  # saved UI settings apply now and on every later save
+        logging.info(f"LLM backends: {', '.join(f'{b.name} ({b.model})' for b in self.router.backends) or 'none'}")
+
+    def preload(self):
+        preload_clients()
+
+    def apply_config(self, config: Dict):
+        if config.get("api_key"):
+            self.init_openai(config["api_key"], config.get("api_base"), config.get("model"))
+        elif self._saved_openai:
+            self.clear_openai()
+
+    def init_openai(self, api_key: str, api_base: str = None, model: str = None):
+        # Settings saved from the UI replace the "openai" backend and make it the preferred one
+        if api_base and not api_base.startswith(("http://", "https://")):
+            raise ValueError(f"api_base must be an http(s) URL, got {api_base!r}")
+        spec = {"name": "openai", "type": "openai", "base_url": api_base or "", "api_key": api_key, "model": model or settings.model}
+        current = next((b for b in self.router.backends if b.name == "openai"), None)
+        if current is not None and (current.api_key, current.base_url, current.model) == (api_key, (api_base or DEFAULT_OPENAI_BASE).rstrip('/'), spec["model"]):
+            return  # unchanged: keep the backend's latency history and circuit state
+        self.router.replace(spec, first=True)
+        self._saved_openai = True
+
+    def clear_openai(self):
+        """The saved key was cleared: drop its backend, falling back to the one from the environment if there is one"""
+        self.router.remove("openai")
+        self._saved_openai = False
+        spec = next((spec for spec in default_backend_specs() if (spec.get("name") or spec.get("type")) == "openai"), None)
+        if spec is not None:
+            self.router.replace(spec, first=True)
+
+    async def aclose(self):
+        await self.router.aclose()  # Release pooled LLM connections
+
+    async def complete(self, messages: List[Dict], use_cache: bool = True, json_schema: Optional[Dict] = None) -> Completion:
+        cache_key = self._cache_key(messages, json_schema)
+        cached = self._cached_completion(cache_key, use_cache)
+        if cached is not None:
+            return Completion(cached, usage_dict("completion_cache", None, completion_cache_hit=True))
+        completion = await self.router.complete(messages, json_schema)
+        completion_cache.set(cache_key, completion.content)
+        logging.info(f"LLM usage: {completion.usage}")
+        return completion
+
+    async def stream_response(self, messages: List[Dict], use_cache: bool = True, usage: Optional[Dict] = None,
+                              json_schema: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Stream completion text; usage, when given, is filled in once the provider reports it"""
+        usage = {} if usage is None else usage
+        cache_key = self._cache_key(messages, json_schema)
+        cached = self._cached_completion(cache_key, use_cache)
+        if cached is not None:
+            usage.update(usage_dict("completion_cache", None, completion_cache_hit=True))
+            yield cached
+            return
+        chunks = []
+        async for delta in self.router.stream(messages, usage, json_schema):
+            chunks.append(delta)
+            yield delta
+        completion_cache.set(cache_key, ''.join(chunks).strip())
+
+    def _cache_key(self, messages: List[Dict], json_schema: Optional[Dict] = None) -> str:
+        return make_key("completion", self.router.cache_identity(), [(m["role"], normalize_prompt(m["content"])) for m in messages], 0.7, 1000, json_schema)
+
+    def _cached_completion(self, cache_key: str, use_cache: bool) -> Optional[str]:
+        if not use_cache:
+            completion_cache.record_bypass()
+            return None
+        cached = completion_cache.get(cache_key)
+        if cached is not None:
+            logging.info("Completion cache hit")
+        return cached
+
+    def process_resume(self, resume: Resume, parsed: Optional[ParsedResume] = None) -> StoredResume:
+        record = StoredResume(
+            resume.content,
+            resume.file_name,
+            resume.file_type,
+            parsed if parsed is not None else ParsedResume.parse(resume.content),
+            enhancement_focus=resume.enhancement_focus,
+            industry_focus=resume.industry_focus,
+            target_keywords=resume.target_keywords,
+            company_culture=resume.company_culture,
+            additional_info=resume.additional_info
         )
-
-    def generate_openai_response(self, prompt: str) -> str:
-        try:
-            if not self.openai_client:
-                raise Exception("OpenAI client not initialized")
-            
-            model = settings.model
-            messages = [
-                {"role": "system", "content": "You are a professional resume writer."},
-                {"role": "user", "content": prompt}
-            ]
-            logging.info(f"Sending request to OpenAI with model: {model}, messages: {messages}")
-            
-            response = self.openai_client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1000
-            )
-            logging.info(f"Raw OpenAI response: {response}")
-            if not response or not hasattr(response, 'choices') or not response.choices:
-                raise Exception(f"Invalid response from OpenAI: {response}")
-            return response.choices[0].message.content.strip()
-        except OpenAIError as e:
-            logging.error(f"OpenAI API specific error: {str(e)}")
-            raise Exception(f"OpenAI API failure: {str(e)}")
-        except Exception as e:
-            logging.error(f"Unexpected error in OpenAI call: {str(e)}")
-            raise Exception(f"Failed to generate response: {str(e)}")
-
-    def generate_ollama_response(self, prompt: str, model: str = "llama2") -> str:
-        with httpx.Client() as client:
-            response = client.post(f"{self.ollama_base_url}/api/generate", json={"model": model, "prompt": prompt})
-            return response.json()["response"]
-
-    def process_resume(self, resume: Resume) -> dict:
-        result = {
-            "status": "success",
-            "content": resume.content,
-            "parsed_sections": {},
-            "metadata": {},
-            "enhancement_focus": resume.enhancement_focus,
-            "industry_focus": resume.industry_focus,
-            "target_keywords": resume.target_keywords,
-            "company_culture": resume.company_culture,
-            "additional_info": resume.additional_info or {}
-        }
-        self.last_resume.clear()
-        self.last_resume.update(result)
-        return result
-
-    def enhance_resume(self, request: EnhanceRequest) -> str:
-        prompt = self._create_enhancement_prompt(request)
-        return self.generate_openai_response(prompt) if self.openai_client else self.generate_ollama_response(prompt)
-
-    def _create_enhancement_prompt(self, request: EnhanceRequest) -> str:
+        record.keyword_coverage()
+        resume_store.create(record)
+        with span("retrieval_index"):
+            resume_retriever.index(resume.content)  # built now so the first fill does not pay for it
+        return record
+
+    async def store_resume(self, resume: Resume, parsed: Optional[ParsedResume] = None) -> StoredResume:
+        """process_resume for async routes, in the threadpool: building the retrieval index is CPU work on the
+        whole text, and a blocking store writes to disk"""
+        return await run_in_threadpool(self.process_resume, resume, parsed)
+
+    def latest_fallback(self) -> bool:
+        return settings.resume_latest_fallback and settings.resume_store_backend != "sqlite"
+
+    def get_resume(self, resume_id: Optional[str] = None) -> StoredResume:
+        # Without an ID fall back to the most recent upload, which is what the single-user desktop app sends.
+        # A store shared across workers serves several clients, and "most recent" would be someone else's resume.
+        if not resume_id and not self.latest_fallback():
+            raise ResumeIdRequired("resume_id is required")
+        resume = resume_store.get(resume_id) if resume_id else resume_store.latest()
+        if resume is None:
+            raise LookupError(f"Unknown resume_id: {resume_id}" if resume_id else "No resume uploaded yet")
+        return resume
+
+    async def load_resume(self, resume_id: Optional[str] = None) -> StoredResume:
+        """get_resume for async routes; a blocking store is read from the threadpool"""
+        if resume_store.blocking:
+            return await run_in_threadpool(self.get_resume, resume_id)
+        return self.get_resume(resume_id)
+
+    def update_resume_settings(self, resume_id: Optional[str], changes: Dict) -> StoredResume:
+        """Change settings of a stored resume in place of a re-upload; the content is not re-extracted or re-parsed"""
+        resume = self.get_resume(resume_id)
+        changes = {name: value for name, value in changes.items() if getattr(resume, name) != value}
+        if not changes:
+            return resume
+        updated = resume_store.update(resume.resume_id, changes)
+        if updated is None:
+            raise LookupError(f"Unknown resume_id: {resume.resume_id}")  # evicted since it was read
+        return updated
+
+    async def enhance_resume(self, request: EnhanceRequest) -> Completion:
         # Use stored resume settings for enhancement
-        last_resume = self.last_resume
-        if not last_resume or "content" not in last_resume:
-            raise Exception("No resume uploaded yet")
-        
-        additional_info_str = ""
-        if last_resume.get("additional_info", {}) and isinstance(last_resume["additional_info"], dict):
-            additional_info_str = "\nAdditional Information:\n" + "\n".join(f"- {k}: {v}" for k, v in last_resume["additional_info"].items())
-
-        prompt = f"""
-        You are a professional resume writer tasked with auto-filling a job application form based on a user's resume. Below is the information provided:
-
-        Resume Content:
-        {last_resume["content"]}
-
-        Job Application Context:
-        Job Title: {request.job_title}
-        Company: {request.company}
-        Field: {request.field}
-
-        Enhancement Focus: {last_resume.get("enhancement_focus", "Clarity & Conciseness")}
-        Industry Focus: {last_resume.get("industry_focus", "Technology")}
-        Target Keywords: {last_resume.get("target_keywords", "")}
-        Company Culture Notes: {last_resume.get("company_culture", "")}
-        {additional_info_str}
-
-        Instructions:
-        1. Analyze the job application context to identify fields requiring auto-completion (e.g., personal information, education, skills, experience, additional questions).
-        2. Use the resume content to generate truthful responses, tailored to the enhancement focus:
-           - For "Clarity & Conciseness": Provide short, clear answers.
-           - For "Professional Tone": Use formal language and structure.
-           - For "Keywords Optimization": Incorporate the target keywords naturally.
-           - For "Impact & Achievement Focus": Highlight results and accomplishments.
-        3. Align responses with the industry focus and reflect the company culture notes where relevant.
-        4. Incorporate any additional information provided to enhance specific fields, such as 'Current GPA' if provided in Additional Information.
-        5. Return the results in plain text format, one field per line, as 'Field: Value'. Do not include selectors or extra explanations or formatting.
-        """
-        return prompt
+        resume = await self.load_resume(request.resume_id)
+        prompt = self._create_enhancement_prompt(request, resume)
+        return await self.complete(prompt.messages, use_cache=not request.bypass_cache)
+
+    def _create_enhancement_prompt(self, request: EnhanceRequest, resume: StoredResume) -> PromptBuild:
+        job_context = f"Job Title: {request.job_title}\nCompany: {request.company}\nField: {request.field}"
+        with span("retrieval"):
+            excerpt = resume_retriever.excerpt(resume.content, [request.job_title, request.field, request.company])
+        with span("prompt_build"):
+            return enhancement_prefix(excerpt.text if excerpt else resume.content, resume.settings()).build(job_context)
 
     def process_extracted_text(self, text: str) -> Dict:
         try:
             logging.info(f"Starting extraction with text length: {len(text)}")
-            cleaned_text = self._clean_text(text)
-            sections = self._split_into_sections(cleaned_text)
-            display_text = self._format_for_display(sections)
-            metrics = self._calculate_metrics(cleaned_text)
-            result = {
+            with span("text_analysis"):
+                analysis = analyze_text(text)
+            return {
                 "status": "success",
-                "display_text": display_text,
+                "display_text": self._format_for_display(analysis.sections),
                 "metadata": {
                     "timestamp": datetime.now().isoformat(),
-                    "word_count": metrics["word_count"],
-                    "sentence_count": metrics["sentence_count"],
-                    "paragraph_count": metrics["paragraph_count"],
-                    "estimated_read_time": metrics["estimated_read_time"]
+                    **analysis.metrics()
                 }
             }
-            self.last_extraction.clear()
-            self.last_extraction.update(result)
-            logging.info(f"Updated last_extraction. Content: {self.last_extraction}")
-            return result
         except Exception as e:
             logging.error(f"Error in process_extracted_text: {str(e)}")
             raise
 
-    def _clean_text(self, text: str) -> str:
-        return re.sub(r'[\s\n.,!?-]+', ' ', text).strip()
-
-    def _split_into_sections(self, text: str) -> list:
-        return [s.strip() for s in re.split(r'\n(?=[A-Z][^a-z]*:|\d+\.)', text) if s.strip()]
-
-    def _format_for_display(self, sections: list) -> str:
-        return "\n".join(f"§{i}. {s.split(':', 1)[0].strip()}\n{s.split(':', 1)[1].strip()}\n" if ':' in s.split('\n')[0] else f"§{i}. Section\n{s}\n" for i, s in enumerate(sections, 1))
-
-    def _calculate_metrics(self, text: str) -> Dict:
-        words = text.split()
-        sentences = re.split(r'[.!?]+', text)
-        paragraphs = [p for p in text.split('\n\n') if p.strip()]
-        return {
-            "word_count": len(words),
-            "sentence_count": len(sentences),
-            "paragraph_count": len(paragraphs),
-            "estimated_read_time": len(words) // 200
-        }
+    def _format_for_display(self, sections: Dict[str, str]) -> str:
+        return "\n".join(f"§{i}. {name.title()}\n{content}\n" for i, (name, content) in enumerate(sections.items(), 1))
 
 core_service = CoreService()
\ No newline at end of file
@@ -0,0 +1,173 @@
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+_SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template", "head"}
+_CONTROL_TAGS = {"input", "select", "textarea"}
+_IGNORED_INPUT_TYPES = {"hidden", "submit", "button", "reset", "image"}
+_CSS_IDENT = re.compile(r'^[A-Za-z_][\w-]*$')
+_WHITESPACE = re.compile(r'\s+')
+
+def _squash(text: str) -> str:
+    return _WHITESPACE.sub(' ', text).strip()
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+@dataclass
+class DomSummary:
+    manifest: str
+    fields: List[Dict] = field(default_factory=list)
+    original_chars: int = 0
+
+    @property
+    def minimized_chars(self) -> int:
+        return len(self.manifest)
+
+    def metadata(self) -> Dict:
+        return {
+            "fields": len(self.fields),
+            "original_chars": self.original_chars,
+            "minimized_chars": self.minimized_chars,
+            "reduction": round(1 - self.minimized_chars / self.original_chars, 4) if self.original_chars else 0.0
+        }
+
+class _FormControlParser(HTMLParser):
+    """Collects form controls with their labels and options, ignoring all other markup"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.fields: List[Dict] = []
+        self.label_for: Dict[str, str] = {}
+        self._skip_depth = 0
+        self._label_text: Optional[List[str]] = None
+        self._label_target: Optional[str] = None
+        self._label_fields: List[Dict] = []
+        self._select: Optional[Dict] = None
+        self._option_text: Optional[List[str]] = None
+        self._textarea: Optional[Dict] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        attrs = {k: v or "" for k, v in attrs}
+        if tag == "label":
+            self._label_text, self._label_target, self._label_fields = [], attrs.get("for"), []
+        elif tag in _CONTROL_TAGS:
+            self._add_control(tag, attrs)
+        elif tag == "option" and self._select is not None:
+            self._option_text = []
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth -= 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag == "label" and self._label_text is not None:
+            text = _squash(' '.join(self._label_text))
+            if text:
+                if self._label_target:
+                    self.label_for[self._label_target] = text
+                for control in self._label_fields:
+                    control.setdefault("label", text)
+            self._label_text = None
+        elif tag == "option" and self._option_text is not None:
+            text = _squash(' '.join(self._option_text))
+            if text:
+                self._select["options"].append(text)
+            self._option_text = None
+        elif tag == "select":
+            self._select = None
+        elif tag == "textarea":
+            self._textarea = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._option_text is not None:
+            self._option_text.append(data)
+        elif self._textarea is not None:
+            return  # prefilled textarea content is not a label
+        elif self._label_text is not None:
+            self._label_text.append(data)
+
+    def _add_control(self, tag, attrs):
+        input_type = attrs.get("type", "text").lower() if tag == "input" else tag
+        if tag == "input" and input_type in _IGNORED_INPUT_TYPES:
+            return
+        control = {"tag": tag, "type": input_type}
+        for key in ("name", "id", "placeholder"):
+            if attrs.get(key):
+                control[key] = _squash(attrs[key])
+        if attrs.get("aria-label"):
+            control["label"] = _squash(attrs["aria-label"])
+        if "required" in attrs:
+            control["required"] = True
+        if tag == "input" and input_type in ("radio", "checkbox") and attrs.get("value"):
+            control["value"] = attrs["value"]
+        if tag == "select":
+            control["options"] = []
+            self._select = control
+        elif tag == "textarea":
+            self._textarea = control
+        if self._label_text is not None:
+            self._label_fields.append(control)
+        self.fields.append(control)
+
+def _selector(control: Dict) -> Optional[str]:
+    if control.get("id") and _CSS_IDENT.match(control["id"]):
+        return f"#{control['id']}"
+    for key in ("name", "placeholder"):
+        if control.get(key):
+            selector = f"{control['tag']}[{key}={_quote(control[key])}]"
+            # Radio and checkbox groups share a name; the value tells the options apart
+            return f"{selector}[value={_quote(control['value'])}]" if control.get("value") else selector
+    return None
+
+def _manifest_line(control: Dict) -> str:
+    parts = [f"label={_quote(control['label'])}"] if control.get("label") else []
+    parts.append(control["tag"] if control["tag"] == control["type"] else f"{control['tag']} type={control['type']}")
+    for key in ("name", "id", "placeholder", "value"):
+        if control.get(key):
+            parts.append(f"{key}={_quote(control[key])}")
+    if control.get("required"):
+        parts.append("required")
+    if control.get("options"):
+        parts.append("options=" + " | ".join(control["options"]))
+    line = "- " + " ".join(parts)
+    return f"{line} [{control['selector']}]" if control.get("selector") else line
+
+def passthrough(content: str) -> DomSummary:
+    return DomSummary(manifest=content, original_chars=len(content))
+
+def minimize_dom(content: str) -> DomSummary:
+    """Reduce scraped form markup to a compact manifest of its fillable controls.
+
+    Content without any form controls (e.g. already-extracted text) is passed through unchanged.
+    """
+    parser = _FormControlParser()
+    try:
+        parser.feed(content)
+        parser.close()
+    except Exception:
+        return passthrough(content)
+    if not parser.fields:
+        return passthrough(content)
+    for control in parser.fields:
+        if "label" not in control and control.get("id") in parser.label_for:
+            control["label"] = parser.label_for[control["id"]]
+        control["selector"] = _selector(control)
+    return DomSummary(manifest=build_manifest(parser.fields), fields=parser.fields, original_chars=len(content))
+
+def build_manifest(fields: List[Dict]) -> str:
+    return "\n".join(_manifest_line(control) for control in fields)
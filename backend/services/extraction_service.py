@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Deque, Dict, List, Optional, Union
+from starlette.concurrency import run_in_threadpool
+from config import settings
+from services.cache_service import parse_cache
+from services.file_service import ExtractedText, file_service
+from services.metrics_service import observe_stage
+
+class ExtractionTimeout(Exception):
+    pass
+
+def _parse_worker(content: bytes, kind: str, max_pages: int, max_chars: int) -> Dict:
+    # Runs in a pool process; module-level so it can be pickled
+    return file_service.parse_bytes(content, kind, max_pages, max_chars)
+
+def _page_count_worker(content: bytes) -> int:
+    return file_service.pdf_page_count(content)
+
+def _pages_worker(content: bytes, first: int, last: int) -> List[str]:
+    return file_service.extract_pdf_pages(content, first, last)
+
+class ExtractionExecutor:
+    """Runs PDF/DOCX extraction in worker processes so parsing does not hold the server's GIL"""
+
+    def __init__(self, workers: int, timeout: float, max_pages: int = 0, max_chars: int = 0,
+                 parallel_min_pages: int = 0, pages_per_task: int = 4):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.parallel_min_pages = parallel_min_pages  # 0 keeps every document in a single worker
+        self.pages_per_task = max(1, pages_per_task)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _reset_pool(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        # A timed-out job keeps its worker busy; terminate the processes so the next pool starts clean.
+        # ProcessPoolExecutor has no public way to reach its workers: _processes (pid -> Process) is a CPython
+        # implementation detail, read defensively so a change there only skips the terminate, not the shutdown.
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def parse_upload(self, content: Union[bytes, BinaryIO], kind: str, digest: Optional[str] = None) -> Dict:
+        """Extract and parse an upload, reusing earlier results for byte-identical files.
+
+        content may be the upload's spooled file; pass its digest when it was hashed while reading.
+        """
+        if digest is None:
+            digest = hashlib.sha256(content if isinstance(content, (bytes, bytearray)) else content.read()).hexdigest()
+            if not isinstance(content, (bytes, bytearray)):
+                content.seek(0)
+        cache_key = file_service.parse_cache_key(kind, digest, self.max_pages, self.max_chars)
+        cached = parse_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        result = await self._run(content, kind)
+        for stage, seconds in result.pop("timings", {}).items():
+            observe_stage(stage, seconds)
+        parse_cache.set(cache_key, result)
+        return result
+
+    async def _run(self, content: Union[bytes, BinaryIO], kind: str) -> Dict:
+        # Plain text and a disabled pool stay in-process and read the spooled file directly
+        if kind == 'txt' or self.workers <= 0:
+            return await run_in_threadpool(file_service.parse_bytes, content, kind, self.max_pages, self.max_chars)
+        if not isinstance(content, (bytes, bytearray)):
+            content = await run_in_threadpool(content.read)  # worker processes need the bytes themselves
+        try:
+            # One deadline for everything, counting the pages included: the PDF is only ever opened in a worker
+            return await asyncio.wait_for(self._extract(content, kind), self.timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"{kind} extraction exceeded {self.timeout}s, restarting extraction pool")
+            self._reset_pool()
+            raise ExtractionTimeout(f"Document extraction timed out after {self.timeout} seconds")
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise
+
+    async def _extract(self, content: bytes, kind: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        pages = await self._parallel_pages(content) if kind == 'pdf' else 0
+        if pages:
+            return await self._run_pages(content, pages)
+        return await loop.run_in_executor(self._get_pool(), _parse_worker, content, kind, self.max_pages, self.max_chars)
+
+    async def _parallel_pages(self, content: bytes) -> int:
+        """Number of pages to extract across workers, or 0 when the document should stay in one worker"""
+        if self.workers <= 1 or not self.parallel_min_pages:
+            return 0
+        try:
+            pages = await asyncio.get_running_loop().run_in_executor(self._get_pool(), _page_count_worker, content)
+        except BrokenProcessPool:
+            raise
+        except Exception:
+            return 0  # let the single-worker path raise the real error
+        if self.max_pages:
+            pages = min(pages, self.max_pages)
+        return pages if pages >= self.parallel_min_pages else 0
+
+    async def _run_pages(self, content: bytes, pages: int) -> Dict:
+        """Extract page ranges in several workers, analyzing each range in document order as soon as it is ready"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        ranges = iter(range(0, pages, self.pages_per_task))
+        pending: Deque[asyncio.Future] = deque()
+
+        def submit():
+            first = next(ranges, None)
+            if first is not None:
+                pending.append(loop.run_in_executor(pool, _pages_worker, content, first, min(first + self.pages_per_task, pages)))
+
+        # Only as many ranges in flight as there are workers, so hitting the character cap leaves little wasted work
+        for _ in range(self.workers):
+            submit()
+        extracted = ExtractedText(self.max_chars)
+        try:
+            while pending:
+                texts = await pending.popleft()
+                submit()
+                # Section analysis is CPU work; one range at a time in the threadpool keeps it in order and off the event loop
+                if not await run_in_threadpool(extracted.add_pages, texts):
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+        return await run_in_threadpool(extracted.result)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+extraction_executor = ExtractionExecutor(
+    workers=settings.extraction_workers,
+    timeout=settings.extraction_timeout,
+    max_pages=settings.extraction_max_pages,
+    max_chars=settings.extraction_max_chars,
+    parallel_min_pages=settings.extraction_parallel_min_pages,
+    pages_per_task=settings.extraction_pages_per_task
+)
@@ -0,0 +1,100 @@
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from services.cache_service import MemoryCache, make_key
+from services.field_parser import parse_fields
+
+# The memory scope is the resume + settings, not the job, so only answers that cannot differ between applications
+# are replayed: identity-style input types, and text/select/number controls whose label names a personal detail.
+# Everything else (textareas, "Why do you want to work here?", "Expected salary", ...) always goes to the LLM.
+MEMOIZABLE_TYPES = {"email", "tel", "url", "date", "month"}
+IDENTITY_TYPES = {"text", "number", "select"}
+_IDENTITY_FIELD = re.compile(
+    r'\b(first name|last name|full name|legal name|given name|family name|middle name|preferred name|surname|'
+    r'phone|mobile|email|e mail|street|address|city|zip|zip code|postal code|country|linkedin|github|portfolio|website|'
+    r'school|university|college|degree|major|minor|gpa|graduation|work authorization|authorized to work|'
+    r'sponsorship|visa|citizenship|pronouns)\b'
+)
+# Words that make an otherwise personal-looking field depend on the job ("Company website", "Start date")
+_JOB_SPECIFIC = re.compile(
+    r'\b(company|employer|organization|position|role|job|title|salary|compensation|pay|rate|why|hear|heard|'
+    r'refer\w*|source|start|available|availability|notice|relocat\w*|cover|interest\w*|reference\w*)\b'
+)
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+def _normalize(value: Optional[str]) -> str:
+    return _NON_ALNUM.sub(' ', (value or '').lower()).strip()
+
+def field_signature(control: Dict) -> str:
+    return '|'.join(_normalize(control.get(key)) for key in ("label", "name", "placeholder"))
+
+def memoizable(control: Dict) -> bool:
+    """Whether a remembered answer for this control is safe to reuse on another company's form"""
+    parts = {_normalize(control.get(key)) for key in ("label", "name", "placeholder")} - {''}
+    words = ' '.join(sorted(parts))
+    if not words or _JOB_SPECIFIC.search(words):
+        return False
+    if control["type"] in MEMOIZABLE_TYPES:
+        return True
+    return control["type"] in IDENTITY_TYPES and (bool(_IDENTITY_FIELD.search(words)) or parts == {"name"})
+
+def field_title(control: Dict) -> str:
+    return control.get("label") or control.get("name") or control.get("placeholder") or control["tag"]
+
+class FieldMemory:
+    """Remembers generated answers per (resume, settings) scope under a normalized field signature"""
+
+    def __init__(self, max_scopes: int, ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self._scopes = MemoryCache(max_entries=max_scopes, ttl=ttl)
+
+    def scope(self, resume_content: str, settings_values: Dict) -> str:
+        resume_hash = hashlib.sha256(resume_content.encode('utf-8')).hexdigest()
+        return make_key("fields", resume_hash, settings_values)
+
+    def split(self, scope: str, fields: List[Dict]) -> Tuple[List[Tuple[Dict, str]], List[Dict]]:
+        """Partition controls into (control, remembered answer) pairs and controls the LLM still has to fill"""
+        answers = (self._scopes.get(scope) or {}) if self.enabled else {}
+        known, unknown = [], []
+        for control in fields:
+            answer = answers.get(field_signature(control)) if memoizable(control) else None
+            if answer is None:
+                unknown.append(control)
+            else:
+                known.append((control, answer))
+        return known, unknown
+
+    def remember(self, scope: str, fields: List[Dict], completion: str) -> int:
+        if not self.enabled or not fields:
+            return 0
+        by_selector = {control["selector"]: control for control in fields if control.get("selector")}
+        by_title = {}
+        for control in fields:
+            for key in ("label", "name", "placeholder"):
+                by_title.setdefault(_normalize(control.get(key)), control)
+        by_title.pop('', None)
+
+        answers = dict(self._scopes.get(scope) or {})
+        learned = 0
+        for parsed in parse_fields(completion):
+            control = by_selector.get(parsed["selector"]) or by_title.get(_normalize(parsed["field"]))
+            if control is None or not memoizable(control) or not parsed["value"]:
+                continue
+            answers[field_signature(control)] = parsed["value"]
+            learned += 1
+        if learned:
+            self._scopes.set(scope, answers)
+        return learned
+
+def format_known(known: List[Tuple[Dict, str]]) -> List[str]:
+    return [
+        f"{field_title(control)}: {answer} [{control['selector']}]" if control.get("selector") else f"{field_title(control)}: {answer}"
+        for control, answer in known
+    ]
+
+field_memory = FieldMemory(
+    max_scopes=settings.field_memory_max_scopes,
+    ttl=settings.field_memory_ttl,
+    enabled=settings.field_memory_enabled
+)
@@ -0,0 +1,38 @@
+import re
+from typing import Dict, List, Optional
+
+# 'Field: Value [Selector]' -- the selector itself may contain brackets, e.g. [input[name="email"]]
+_FIELD_LINE = re.compile(r'^\s*(?:[-*]\s+)?(?P<field>[^:\n]+?)\s*:\s*(?P<value>.*?)(?:\s+\[(?P<selector>\S.*)\])?\s*$')
+
+def parse_field_line(line: str) -> Optional[Dict]:
+    match = _FIELD_LINE.match(line)
+    if not match or not match.group('value') and not match.group('selector'):
+        return None
+    return {
+        "field": match.group('field').strip(),
+        "value": match.group('value').strip(),
+        "selector": match.group('selector')
+    }
+
+def parse_fields(text: str) -> List[Dict]:
+    return [field for field in (parse_field_line(line) for line in text.splitlines()) if field]
+
+class FieldStreamParser:
+    """Turns streamed completion deltas into parsed fields as each line completes"""
+
+    def __init__(self):
+        self._buffer = ""
+        self.text = ""
+
+    def feed(self, delta: str) -> List[Dict]:
+        self.text += delta
+        self._buffer += delta
+        if '\n' not in self._buffer:
+            return []
+        *lines, self._buffer = self._buffer.split('\n')
+        return [field for field in (parse_field_line(line) for line in lines) if field]
+
+    def close(self) -> List[Dict]:
+        line, self._buffer = self._buffer, ""
+        field = parse_field_line(line)
+        return [field] if field else []
@@ -1,11 +1,79 @@
+import io
 import os
-import PyPDF2
-import docx
+import time
 from pathlib import Path
-from typing import Dict
-import re
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+from itertools import islice
+from services.cache_service import make_key
+from models.resume import ParsedResume
+from services.text_analysis import TextAnalyzer, normalize_newlines
+
+# Bump when extraction or parse_resume output changes so persisted parse-cache entries are not reused
+PARSE_CACHE_VERSION = 3
+
+# The document parsers load on first use, keeping them out of server startup
+def _pdf_reader(file_obj):
+    from PyPDF2 import PdfReader
+    return PdfReader(file_obj)
+
+def _docx_document(source):
+    import docx
+    return docx.Document(source)
+
+class ExtractedText:
+    """Accumulates extracted text up to max_chars and runs section detection on each piece as it arrives"""
+
+    def __init__(self, max_chars: int = 0):
+        self.max_chars = max_chars
+        self._parts: List[str] = []
+        self._length = 0
+        self._analyzer = TextAnalyzer()
+        self._started = time.perf_counter()
+        self.analysis_seconds = 0.0
+
+    @property
+    def full(self) -> bool:
+        return bool(self.max_chars) and self._length >= self.max_chars
+
+    def add(self, text: str) -> bool:
+        """Append text; returns False once the character cap is reached so the caller can stop extracting"""
+        if self.full:
+            return False
+        if self.max_chars:
+            text = text[:self.max_chars - self._length]
+        # Kept normalized so the section offsets from the analyzer point straight into the stored text
+        text = normalize_newlines(text)
+        self._parts.append(text)
+        self._length += len(text)
+        start = time.perf_counter()
+        self._analyzer.feed(text)
+        self.analysis_seconds += time.perf_counter() - start
+        return not self.full
+
+    def add_pages(self, pages: Iterable[str]) -> bool:
+        # Same layout as before: non-empty pages joined by a newline
+        for page in pages:
+            if not page:
+                continue
+            if (self._length and not self.add('\n')) or not self.add(page):
+                return False
+        return True
+
+    def result(self) -> Dict:
+        start = time.perf_counter()
+        text = ''.join(self._parts)
+        # Plain dict so it pickles out of worker processes and fits the JSON disk cache
+        parsed = ParsedResume.from_analysis(self._analyzer.close(), text).to_dict()
+        self.analysis_seconds += time.perf_counter() - start
+        # Extraction and analysis interleave; extraction gets whatever time analysis did not use
+        timings = {"extract": time.perf_counter() - self._started - self.analysis_seconds, "text_analysis": self.analysis_seconds}
+        return {"text": text, "parsed": parsed, "timings": timings}
 
 class FileService:
+    def preload(self):
+        """Import the document parsers ahead of the first upload"""
+        import docx, PyPDF2  # noqa: F401
+
     def read_file_content(self, file_path: str) -> str:
         """Read content from PDF, DOCX, or TXT files"""
         ext = Path(file_path).suffix.lower()
@@ -18,90 +86,66 @@ class FileService:
         else:
             raise ValueError(f"Unsupported file type: {ext}")
 
-    # New helper to read PDF from a file-like object (bytes)
-    def _read_pdf_from_bytes(self, file_obj) -> str:
-        reader = PyPDF2.PdfReader(file_obj)
-        return ' '.join(page.extract_text() for page in reader.pages if page.extract_text())
+    def detect_file_kind(self, file_name: str, content_type: Optional[str]) -> str:
+        file_name = (file_name or '').lower()
+        if content_type == 'application/pdf' or file_name.endswith('.pdf'):
+            return 'pdf'
+        if content_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' or file_name.endswith('.docx'):
+            return 'docx'
+        return 'txt'
+
+    def extract_text(self, content: Union[bytes, BinaryIO], kind: str, max_pages: int = 0, max_chars: int = 0) -> str:
+        return self.parse_bytes(content, kind, max_pages, max_chars)["text"]
+
+    def parse_bytes(self, content: Union[bytes, BinaryIO], kind: str, max_pages: int = 0, max_chars: int = 0) -> Dict:
+        # Accepts raw bytes or an open binary file (e.g. the upload's spooled temp file) without copying it
+        is_bytes = isinstance(content, (bytes, bytearray))
+        extracted = ExtractedText(max_chars)
+        if kind == 'pdf':
+            # Pages are analyzed as they are extracted and extraction stops once the character cap is hit
+            extracted.add_pages(self.iter_pdf_pages(io.BytesIO(content) if is_bytes else content, 0, max_pages or None))
+        elif kind == 'docx':
+            extracted.add(self._read_docx_from_bytes(io.BytesIO(content) if is_bytes else content))
+        else:
+            extracted.add((content if is_bytes else content.read()).decode())
+        # Timings are measured here because this usually runs in a worker process; the caller records them
+        return extracted.result()
+
+    def pdf_page_count(self, content: bytes) -> int:
+        return len(_pdf_reader(io.BytesIO(content)).pages)
+
+    def iter_pdf_pages(self, file_obj, first: int = 0, last: Optional[int] = None) -> Iterator[str]:
+        """Lazily yield the text of pages [first, last), extracting each page exactly once"""
+        reader = _pdf_reader(file_obj)
+        for page in islice(reader.pages, first, last):
+            yield page.extract_text() or ''
+
+    def extract_pdf_pages(self, content: bytes, first: int, last: int) -> List[str]:
+        return list(self.iter_pdf_pages(io.BytesIO(content), first, last))
+
+    def parse_cache_key(self, kind: str, digest: str, max_pages: int = 0, max_chars: int = 0) -> str:
+        # The caps are part of the key: after raising one, the disk cache must not keep serving the truncated text
+        return make_key("parse", PARSE_CACHE_VERSION, kind, digest, max_pages, max_chars)
 
     # New helper to read DOCX from a file-like object (bytes)
     def _read_docx_from_bytes(self, file_obj) -> str:
-        doc = docx.Document(file_obj)
-        return ' '.join(paragraph.text for paragraph in doc.paragraphs)
+        doc = _docx_document(file_obj)
+        return '\n'.join(paragraph.text for paragraph in doc.paragraphs)
 
     def _read_pdf(self, file_path: str) -> str:
         with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            return ' '.join(page.extract_text() for page in reader.pages if page.extract_text())
+            return '\n'.join(page for page in self.iter_pdf_pages(file) if page)
 
     def _read_docx(self, file_path: str) -> str:
-        doc = docx.Document(file_path)
-        return ' '.join(paragraph.text for paragraph in doc.paragraphs)
+        doc = _docx_document(file_path)
+        return '\n'.join(paragraph.text for paragraph in doc.paragraphs)
 
     def _read_txt(self, file_path: str) -> str:
         with open(file_path, 'r', encoding='utf-8') as file:
             return file.read()
 
-    def parse_resume(self, content: str) -> Dict:
+    def parse_resume(self, content: str) -> ParsedResume:
         """Parse resume content into a structured format"""
-        cleaned_content = self._clean_text(content)
-        sections = self._identify_sections(cleaned_content)
-        return {
-            "parsed_sections": sections,
-            "summary": self._create_summary(sections),
-            "metadata": self._extract_metadata(cleaned_content)
-        }
-
-    def _clean_text(self, text: str) -> str:
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[\r\n]+', '\n', text)
-        return text.strip()
-
-    def _identify_sections(self, text: str) -> Dict:
-        common_headers = [
-            "experience", "education", "skills", "projects",
-            "summary", "objective", "certifications"
-        ]
-        sections = {}
-        current_section = "other"
-        current_content = []
-        for line in text.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-            line_lower = line.lower()
-            found_header = False
-            for header in common_headers:
-                if header in line_lower and len(line) < 50:
-                    if current_content:
-                        sections[current_section] = '\n'.join(current_content)
-                    current_section = header
-                    current_content = []
-                    found_header = True
-                    break
-            if not found_header:
-                current_content.append(line)
-        if current_content:
-            sections[current_section] = '\n'.join(current_content)
-        return sections
-
-    def _create_summary(self, sections: Dict) -> str:
-        summary_parts = []
-        if "summary" in sections:
-            summary_parts.append(sections["summary"])
-        if "experience" in sections:
-            exp_sentences = re.split(r'[.!?]+', sections["experience"])
-            summary_parts.append(' '.join(exp_sentences[:2]))
-        if "skills" in sections:
-            summary_parts.append(f"Key skills include: {sections['skills']}")
-        return ' '.join(summary_parts)
-
-    def _extract_metadata(self, text: str) -> Dict:
-        words = text.split()
-        sentences = re.split(r'[.!?]+', text)
-        return {
-            "word_count": len(words),
-            "sentence_count": len(sentences),
-            "estimated_read_time": len(words) // 200
-        }
+        return ParsedResume.parse(content)
 
 file_service = FileService()
\ No newline at end of file
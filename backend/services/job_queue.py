@@ -0,0 +1,237 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from config import settings
+from services.cache_service import MemoryCache
+from services.resume_store import SQLiteResumeStore, resume_store
+from services.metrics_service import current_route, metrics
+
+JOB_WAIT_SECONDS = metrics.histogram("resume_filler_job_wait_seconds", "Time jobs spend queued before a worker picks them up", ("kind",))
+JOB_RUN_SECONDS = metrics.histogram("resume_filler_job_run_seconds", "Time jobs spend running", ("kind", "status"))
+JOBS_SUBMITTED = metrics.counter("resume_filler_jobs_submitted_total", "Submitted jobs, including ones merged into a running duplicate", ("kind", "deduplicated"))
+
+class QueueFull(Exception):
+    pass
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    key: str  # identical submissions share a key and are merged while the first one is unfinished
+    client: str
+    priority: int
+    run: Callable[[], Awaitable[Dict]] = field(repr=False)
+    route: str = "unmatched"  # metrics label of the submitting request, reused while the job runs
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+class SQLiteJobResults:
+    """Job snapshots in the shared SQLite file, so a job submitted to one uvicorn worker can be polled through any other"""
+
+    def __init__(self, path: Path, max_entries: int = 1000, ttl: float = 0):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data, updated_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (self.ttl and row[1] < time.time() - self.ttl):
+            return None
+        return json.loads(row[0])
+
+    def set(self, job_id: str, snapshot: Dict):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO jobs (id, data, updated_at) VALUES (?, ?, ?)", (job_id, json.dumps(snapshot), now))
+            if self.ttl:
+                conn.execute("DELETE FROM jobs WHERE updated_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM jobs WHERE id NOT IN (SELECT id FROM jobs ORDER BY updated_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+class JobQueue:
+    """Bounded asyncio worker pool: higher priority first, FIFO within a priority, and at most
+    max_per_client running jobs per client so one busy client cannot occupy every worker"""
+
+    def __init__(self, workers: int, max_per_client: int, max_queued: int, result_ttl: float, max_results: int = 1000,
+                 shared_results: Optional[SQLiteJobResults] = None):
+        self.workers = max(1, workers)
+        self.max_per_client = max_per_client
+        self.max_queued = max_queued
+        self._queue: List[Tuple[int, int, Job]] = []
+        self._seq = itertools.count()
+        self._jobs: Dict[str, Job] = {}  # queued and running
+        self._inflight: Dict[str, Job] = {}  # single-flight key -> unfinished job
+        self._running: Dict[str, int] = defaultdict(int)
+        # Finished jobs are kept as snapshots until the TTL lapses. With several workers every state change is
+        # also written to the shared store, since the poll may land on a worker that never saw the job.
+        self._results = MemoryCache(max_entries=max_results, ttl=result_ttl)
+        self._shared = shared_results
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, key: str, run: Callable[[], Awaitable[Dict]], client: str = "anonymous",
+                     priority: int = 0, kind: str = "job") -> Tuple[Job, bool]:
+        """Queue run() and return (job, deduplicated); an unfinished job with the same key is returned instead"""
+        self._ensure_workers()
+        existing = self._inflight.get(key)
+        if existing is not None:
+            JOBS_SUBMITTED.inc(kind=kind, deduplicated="true")
+            return existing, True
+        if len(self._queue) >= self.max_queued:
+            raise QueueFull(f"The job queue is full ({self.max_queued} jobs waiting)")
+        job = Job(uuid.uuid4().hex, kind, key, client, priority, run, current_route.get())
+        self._jobs[job.id] = self._inflight[key] = job
+        async with self._wakeup:
+            heapq.heappush(self._queue, (-priority, next(self._seq), job))
+            self._wakeup.notify()
+        JOBS_SUBMITTED.inc(kind=kind, deduplicated="false")
+        await self._publish(job)
+        return job, False
+
+    async def _publish(self, job: Job):
+        if self._shared is not None:
+            try:
+                await run_in_threadpool(self._shared.set, job.id, job.snapshot())
+            except sqlite3.Error as e:
+                logging.error(f"Could not publish job {job.id} to the shared store: {str(e)}")
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            snapshot = self._results.get(job_id)
+            if snapshot is None and self._shared is not None:
+                snapshot = await run_in_threadpool(self._shared.get, job_id)
+            return snapshot
+        snapshot = job.snapshot()
+        mine = next((entry for entry in self._queue if entry[2] is job), None)
+        if mine is not None:
+            snapshot["position"] = sum(1 for entry in self._queue if entry[:2] < mine[:2]) + 1
+        return snapshot
+
+    def _next_job(self) -> Optional[Job]:
+        # Pop until a job whose client still has a free running slot turns up; the rest go back unchanged
+        skipped, job = [], None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            if not self.max_per_client or self._running[entry[2].client] < self.max_per_client:
+                job = entry[2]
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+        return job
+
+    async def _worker(self):
+        while True:
+            async with self._wakeup:
+                job = self._next_job()
+                while job is None:
+                    await self._wakeup.wait()
+                    job = self._next_job()
+                self._running[job.client] += 1
+            try:
+                await self._execute(job)
+            finally:
+                async with self._wakeup:
+                    self._running[job.client] -= 1
+                    if not self._running[job.client]:
+                        del self._running[job.client]
+                    self._wakeup.notify_all()  # a client below its limit again may unblock skipped jobs
+
+    async def _execute(self, job: Job):
+        job.status, job.started_at = "running", time.time()
+        JOB_WAIT_SECONDS.observe(job.started_at - job.created_at, kind=job.kind)
+        token = current_route.set(job.route)
+        try:
+            await self._publish(job)
+            job.result = await job.run()
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status, job.error = "failed", "Cancelled during shutdown"
+            raise
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.status, job.error = "failed", str(e)
+        finally:
+            current_route.reset(token)
+            job.finished_at = time.time()
+            JOB_RUN_SECONDS.observe(job.finished_at - job.started_at, kind=job.kind, status=job.status)
+            self._jobs.pop(job.id, None)
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+            self._results.set(job.id, job.snapshot())
+            await self._publish(job)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queued": len(self._queue),
+            "running": sum(self._running.values()),
+            "retained_results": len(self._results)
+        }
+
+    async def aclose(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    max_per_client=settings.job_max_per_client,
+    max_queued=settings.job_max_queued,
+    result_ttl=settings.job_result_ttl,
+    shared_results=SQLiteJobResults(resume_store.path, ttl=settings.job_result_ttl) if isinstance(resume_store, SQLiteResumeStore) else None
+)
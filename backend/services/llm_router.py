@@ -0,0 +1,516 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+from config import settings
+from services.metrics_service import LLMTimer, metrics
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+DEFAULT_OPENAI_BASE = "https://api.openai.com/v1"
+
+LLM_HEDGES = metrics.counter("resume_filler_llm_hedges_total", "Hedged requests started on a second backend", ("backend",))
+LLM_FAILURES = metrics.counter("resume_filler_llm_failures_total", "Failed LLM backend calls", ("backend",))
+LLM_CIRCUIT_OPENS = metrics.counter("resume_filler_llm_circuit_opens_total", "Times a backend's circuit breaker opened", ("backend",))
+
+# The OpenAI SDK and httpx are the slowest imports in the app; load them on the first LLM call instead of at startup
+@lru_cache(maxsize=1)
+def _openai():
+    import openai
+    return openai
+
+@lru_cache(maxsize=1)
+def _httpx():
+    import httpx
+    return httpx
+
+def preload_clients():
+    _openai()
+    _httpx()
+
+@dataclass
+class Completion:
+    content: str
+    usage: Dict = field(default_factory=dict)
+
+def usage_dict(backend: str, model: Optional[str], prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+               cached_tokens: Optional[int] = None, completion_cache_hit: bool = False) -> Dict:
+    return {
+        "backend": backend,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,  # prompt tokens served from the provider's prefix cache
+        "completion_cache_hit": completion_cache_hit
+    }
+
+def _sample_log() -> bool:
+    # Full prompt/response dumps are large; log only a sample of calls
+    return settings.llm_log_sample_rate > 0 and random.random() < settings.llm_log_sample_rate
+
+def _p95(samples) -> Optional[float]:
+    if len(samples) < settings.llm_hedge_min_samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+class LLMBackend:
+    """One completion endpoint with latency tracking and a consecutive-failure circuit breaker"""
+    kind = ""
+
+    def __init__(self, name: str, model: str, base_url: str, pool: "LLMRouter"):
+        self.name = name
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool
+        self.latencies = deque(maxlen=settings.llm_latency_window)
+        self.first_token_latencies = deque(maxlen=settings.llm_latency_window)
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.successes = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= settings.llm_circuit_cooldown else "open"
+
+    def available(self) -> bool:
+        # A half-open backend gets a single trial request; its outcome closes or re-opens the circuit
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial_running)
+
+    def expected_latency(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2]
+
+    def hedge_delay(self, streaming: bool) -> float:
+        p95 = _p95(self.first_token_latencies if streaming else self.latencies)
+        return max(settings.llm_hedge_min_delay, p95 if p95 is not None else settings.llm_hedge_delay)
+
+    def _begin(self):
+        if self.state == "half_open":
+            self._trial_running = True
+
+    def _record_success(self, seconds: float, first_token: Optional[float] = None):
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self.latencies.append(seconds)
+        if first_token is not None:
+            self.first_token_latencies.append(first_token)
+
+    def _record_failure(self, error: Exception):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._trial_running = False
+        LLM_FAILURES.inc(backend=self.name)
+        logging.warning(f"LLM backend {self.name} failed: {error}")
+        if self.opened_at is not None or self.consecutive_failures >= settings.llm_circuit_failures:
+            if self.opened_at is None:
+                LLM_CIRCUIT_OPENS.inc(backend=self.name)
+            self.opened_at = time.monotonic()
+
+    async def complete(self, messages: List[Dict], json_schema: Optional[Dict] = None) -> Completion:
+        self._begin()
+        try:
+            async with self.pool.slots():
+                timer = LLMTimer(self.name, self.model)
+                completion = await self._complete(messages, json_schema)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        except BaseException:
+            # Cancelled (a losing hedge, a client disconnect): says nothing about the backend's health, but frees the trial slot
+            self._trial_running = False
+            raise
+        completion.usage["seconds"] = round(timer.done(completion.usage), 3)
+        self._record_success(completion.usage["seconds"])
+        return completion
+
+    async def stream(self, messages: List[Dict], usage: Dict, json_schema: Optional[Dict] = None) -> AsyncIterator[str]:
+        self._begin()
+        first_token = None
+        try:
+            async with self.pool.slots():
+                timer = LLMTimer(self.name, self.model)
+                async for delta in self._stream(messages, usage, json_schema):
+                    if first_token is None:
+                        timer.first_token()
+                        first_token = timer.first_token_at - timer.start
+                    yield delta
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        except BaseException:
+            # CancelledError, or GeneratorExit when the consumer closes the stream early
+            self._trial_running = False
+            raise
+        usage["seconds"] = round(timer.done(usage), 3)
+        self._record_success(usage["seconds"], first_token)
+
+    async def _complete(self, messages: List[Dict], json_schema: Optional[Dict]) -> Completion:
+        raise NotImplementedError
+
+    def _stream(self, messages: List[Dict], usage: Dict, json_schema: Optional[Dict]) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "model": self.model,
+            "base_url": self.base_url,
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "p50_seconds": self.expected_latency(),
+            "p95_seconds": _p95(self.latencies),
+            "first_token_p95_seconds": _p95(self.first_token_latencies)
+        }
+
+class OpenAIBackend(LLMBackend):
+    kind = "openai"
+
+    def __init__(self, name: str, model: str, base_url: str, api_key: str, pool: "LLMRouter"):
+        super().__init__(name, model, base_url or DEFAULT_OPENAI_BASE, pool)
+        self.api_key = api_key
+        self._client: Optional["AsyncOpenAI"] = None
+        self._client_http: Optional["httpx.AsyncClient"] = None
+        if not api_key:
+            raise ValueError("an api_key is required")  # the one check the SDK client would fail on, without importing it
+
+    def _get_client(self) -> "AsyncOpenAI":
+        # Rebind when the shared pool was rebuilt after a shutdown
+        http_client = self.pool.http_client()
+        if self._client is None or self._client_http is not http_client:
+            self._client = _openai().AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client, timeout=self.pool.timeout())
+            self._client_http = http_client
+        return self._client
+
+    def _usage(self, usage) -> Dict:
+        if usage is None:
+            return usage_dict(self.name, self.model)
+        details = getattr(usage, "prompt_tokens_details", None)
+        return usage_dict(self.name, self.model, usage.prompt_tokens, usage.completion_tokens, getattr(details, "cached_tokens", None))
+
+    @staticmethod
+    def _response_format(json_schema: Optional[Dict]) -> Dict:
+        if json_schema is None:
+            return {}
+        if settings.llm_json_schema_mode:
+            return {"response_format": {"type": "json_schema", "json_schema": {"name": "structured_output", "strict": True, "schema": json_schema}}}
+        return {"response_format": {"type": "json_object"}}
+
+    async def _complete(self, messages: List[Dict], json_schema: Optional[Dict]) -> Completion:
+        sampled = _sample_log()
+        if sampled:
+            logging.info(f"Sending request to {self.name} with model: {self.model}, messages: {messages}")
+        try:
+            response = await self._get_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1000,
+                **self._response_format(json_schema)
+            )
+        except _openai().OpenAIError as e:
+            raise Exception(f"OpenAI API failure: {str(e)}")
+        if sampled:
+            logging.info(f"Raw {self.name} response: {response}")
+        if not response or not hasattr(response, 'choices') or not response.choices:
+            raise Exception(f"Invalid response from OpenAI: {response}")
+        return Completion(response.choices[0].message.content.strip(), self._usage(response.usage))
+
+    async def _stream(self, messages: List[Dict], usage: Dict, json_schema: Optional[Dict]) -> AsyncIterator[str]:
+        usage.update(usage_dict(self.name, self.model))
+        extra = {"stream_options": {"include_usage": True}} if settings.llm_stream_usage else {}
+        extra.update(self._response_format(json_schema))
+        sampled = _sample_log()
+        if sampled:
+            logging.info(f"Streaming request to {self.name} with model: {self.model}, messages: {messages}")
+        chunks = []
+        try:
+            stream = await self._get_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1000,
+                stream=True,
+                **extra
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage.update(self._usage(chunk.usage))
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        except _openai().OpenAIError as e:
+            raise Exception(f"OpenAI API failure: {str(e)}")
+        if sampled:
+            logging.info(f"Streamed {self.name} response: {''.join(chunks)}")
+
+class OllamaBackend(LLMBackend):
+    kind = "ollama"
+
+    @staticmethod
+    def _request(messages: List[Dict], json_schema: Optional[Dict]) -> Dict:
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        prompt = "\n\n".join(m["content"] for m in messages if m["role"] != "system")
+        request = {"system": system, "prompt": prompt} if system else {"prompt": prompt}
+        if json_schema is not None:
+            request["format"] = "json"
+        return request
+
+    def _usage(self, data: Dict) -> Dict:
+        # Ollama reports only the prompt tokens it had to evaluate; a KV-cache hit shows up as a smaller prompt_eval_count
+        return usage_dict(self.name, self.model, data.get("prompt_eval_count"), data.get("eval_count"))
+
+    async def _complete(self, messages: List[Dict], json_schema: Optional[Dict]) -> Completion:
+        sampled = _sample_log()
+        if sampled:
+            logging.info(f"Sending request to {self.name} with model: {self.model}, messages: {messages}")
+        response = await self.pool.http_client().post(
+            f"{self.base_url}/api/generate",
+            json={"model": self.model, "stream": False, **self._request(messages, json_schema)}
+        )
+        response.raise_for_status()
+        data = response.json()
+        if sampled:
+            logging.info(f"Raw {self.name} response: {data}")
+        return Completion(data["response"], self._usage(data))
+
+    async def _stream(self, messages: List[Dict], usage: Dict, json_schema: Optional[Dict]) -> AsyncIterator[str]:
+        usage.update(usage_dict(self.name, self.model))
+        sampled = _sample_log()
+        if sampled:
+            logging.info(f"Streaming request to {self.name} with model: {self.model}, messages: {messages}")
+        chunks = []
+        async with self.pool.http_client().stream(
+            "POST",
+            f"{self.base_url}/api/generate",
+            json={"model": self.model, "stream": True, **self._request(messages, json_schema)}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("response"):
+                    chunks.append(data["response"])
+                    yield data["response"]
+                if data.get("done"):
+                    usage.update(self._usage(data))
+                    break
+        if sampled:
+            logging.info(f"Streamed {self.name} response: {''.join(chunks)}")
+
+class LLMRouter:
+    """Routes completions across configured backends.
+
+    Healthy backends are tried fastest-first (configured order until they have latency samples).
+    When the chosen backend has not answered (or, when streaming, produced a first token) within
+    its p95, the same request is hedged on the next backend and whichever succeeds first wins.
+    Errors fail over to the next backend, and backends that keep failing are skipped until their
+    circuit cooldown has passed.
+    """
+
+    def __init__(self):
+        self.backends: List[LLMBackend] = []
+        self._http_client: Optional["httpx.AsyncClient"] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def timeout(self) -> "httpx.Timeout":
+        return _httpx().Timeout(settings.llm_timeout, connect=settings.llm_connect_timeout)
+
+    def http_client(self) -> "httpx.AsyncClient":
+        # One pooled keep-alive client shared by every backend; rebuilt if closed on shutdown
+        if self._http_client is None or self._http_client.is_closed:
+            httpx = _httpx()
+            self._http_client = httpx.AsyncClient(
+                timeout=self.timeout(),
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_connections,
+                    max_keepalive_connections=settings.llm_max_keepalive_connections,
+                    keepalive_expiry=settings.llm_keepalive_expiry
+                )
+            )
+        return self._http_client
+
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.llm_max_concurrency)
+        return self._slots
+
+    async def aclose(self):
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+
+    def build_backend(self, spec: Dict) -> LLMBackend:
+        kind = spec.get("type", "openai")
+        name = spec.get("name") or kind
+        if kind == "openai":
+            return OpenAIBackend(name, spec.get("model") or settings.model, spec.get("base_url", ""), spec.get("api_key", ""), self)
+        if kind == "ollama":
+            return OllamaBackend(name, spec.get("model") or settings.ollama_model, spec.get("base_url") or settings.ollama_base_url, self)
+        raise ValueError(f"Unknown LLM backend type: {kind}")
+
+    def configure(self, specs: List[Dict]):
+        backends = []
+        for spec in specs:
+            try:
+                backends.append(self.build_backend(spec))
+            except Exception as e:
+                logging.error(f"Skipping LLM backend {spec.get('name') or spec.get('type')}: {e}")
+        self.backends = backends
+
+    def replace(self, spec: Dict, first: bool = False):
+        backend = self.build_backend(spec)
+        others = [b for b in self.backends if b.name != backend.name]
+        self.backends = [backend] + others if first else others + [backend]
+
+    def remove(self, name: str):
+        self.backends = [b for b in self.backends if b.name != name]
+
+    def cache_identity(self) -> List:
+        return [(b.kind, b.base_url, b.model) for b in self.backends]
+
+    def ranked(self) -> List[LLMBackend]:
+        if not self.backends:
+            raise Exception("No LLM backend configured")
+        available = [b for b in self.backends if b.available()]
+        if not available:
+            # Every circuit is open: try them anyway, longest-open first, rather than failing outright
+            return sorted(self.backends, key=lambda b: b.opened_at or 0)
+        position = {id(b): i for i, b in enumerate(self.backends)}
+        # Measured backends go fastest-first; unmeasured ones follow in configured order until hedging or failover samples them
+        return sorted(available, key=lambda b: (b.expected_latency() is None, b.expected_latency() or 0, position[id(b)]))
+
+    def _can_hedge(self, candidates: List[LLMBackend], next_index: int, hedged: bool) -> bool:
+        return settings.llm_hedge_enabled and not hedged and next_index < len(candidates)
+
+    async def complete(self, messages: List[Dict], json_schema: Optional[Dict] = None) -> Completion:
+        """json_schema switches the backends to JSON output (a strict schema where supported)"""
+        candidates = self.ranked()
+        pending: Dict[asyncio.Task, LLMBackend] = {}
+        errors: List[str] = []
+        next_index, hedged = 0, False
+
+        def launch():
+            nonlocal next_index
+            backend = candidates[next_index]
+            next_index += 1
+            pending[asyncio.create_task(backend.complete(messages, json_schema))] = backend
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if len(pending) == 1 and self._can_hedge(candidates, next_index, hedged):
+                    timeout = next(iter(pending.values())).hedge_delay(streaming=False)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    LLM_HEDGES.inc(backend=candidates[next_index].name)
+                    launch()
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        completion = task.result()
+                        completion.usage["hedged"] = hedged
+                        return completion
+                    errors.append(f"{backend.name}: {task.exception()}")
+                if not pending and next_index < len(candidates):
+                    launch()
+            raise Exception("All LLM backends failed: " + "; ".join(errors))
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, messages: List[Dict], usage: Dict, json_schema: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Stream from whichever backend produces a first token first; later errors are not retried"""
+        candidates = self.ranked()
+        attempts: Dict[asyncio.Task, tuple] = {}
+        errors: List[str] = []
+        next_index, hedged = 0, False
+        winner = None
+
+        def launch():
+            nonlocal next_index
+            backend = candidates[next_index]
+            next_index += 1
+            attempt_usage: Dict = {}
+            generator = backend.stream(messages, attempt_usage, json_schema)
+            attempts[asyncio.ensure_future(generator.__anext__())] = (backend, generator, attempt_usage)
+
+        launch()
+        try:
+            while attempts and winner is None:
+                timeout = None
+                if len(attempts) == 1 and self._can_hedge(candidates, next_index, hedged):
+                    timeout = next(iter(attempts.values()))[0].hedge_delay(streaming=True)
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    LLM_HEDGES.inc(backend=candidates[next_index].name)
+                    launch()
+                    continue
+                for task in done:
+                    backend, generator, attempt_usage = attempts.pop(task)
+                    error = task.exception()
+                    if error is None or isinstance(error, StopAsyncIteration):
+                        winner = (generator, attempt_usage, None if error else task.result())
+                        break
+                    errors.append(f"{backend.name}: {error}")
+                if winner is None and not attempts and next_index < len(candidates):
+                    launch()
+        finally:
+            for task, (_, generator, _) in attempts.items():
+                task.cancel()
+            if attempts:
+                await asyncio.gather(*attempts, return_exceptions=True)
+                for _, generator, _ in attempts.values():
+                    await generator.aclose()
+        if winner is None:
+            raise Exception("All LLM backends failed: " + "; ".join(errors))
+
+        generator, attempt_usage, first = winner
+        try:
+            if first is not None:
+                yield first
+                async for delta in generator:
+                    yield delta
+        finally:
+            await generator.aclose()
+            usage.update(attempt_usage)
+            usage["hedged"] = hedged
+
+    def stats(self) -> List[Dict]:
+        return [backend.stats() for backend in self.backends]
+
+def default_backend_specs() -> List[Dict]:
+    """LLM_BACKENDS if set, otherwise the OpenAI settings (when a key is configured) with local Ollama as fallback"""
+    if settings.llm_backends:
+        return settings.llm_backends
+    specs = []
+    if settings.openai_api_key:
+        specs.append({"name": "openai", "type": "openai", "base_url": settings.openai_api_base, "api_key": settings.openai_api_key, "model": settings.model})
+    specs.append({"name": "ollama", "type": "ollama", "base_url": settings.ollama_base_url, "model": settings.ollama_model})
+    return specs
+
+llm_router = LLMRouter()
+llm_router.configure(default_backend_specs())
@@ -0,0 +1,257 @@
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import anyio.to_thread
+from config import settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STDLIB_DIR = os.path.dirname(os.__file__)
+# Pseudo-frames: where a suspended request was waiting (LLM I/O, the threadpool, a lock) and work handed to a worker thread
+AWAIT_FRAME = "(await)"
+THREADPOOL_FRAME = "(threadpool)"
+TRUNCATED_FRAME = "(other stacks)"
+
+_labels: Dict[object, str] = {}
+
+def _label(code) -> str:
+    """function (path:line) with the path shortened to the package or app module"""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+            if marker in path:
+                path = path.rsplit(marker, 1)[1]
+                break
+        else:
+            for root in (BACKEND_DIR, STDLIB_DIR):
+                if path.startswith(root + os.sep):
+                    path = os.path.relpath(path, root)
+                    break
+        name = getattr(code, "co_qualname", code.co_name)
+        # ';' separates frames in the folded format
+        label = _labels[code] = f"{name} ({path}:{code.co_firstlineno})".replace(";", ":")
+    return label
+
+def _await_frames(coro) -> List:
+    """Frames of a suspended coroutine chain, outermost first"""
+    frames = []
+    while coro is not None and len(frames) < 200:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+class ProfiledRequest:
+    __slots__ = ("frame", "task", "start", "stacks", "samples")
+
+    def __init__(self, frame, task):
+        self.frame = frame  # the middleware's frame: stacks are cut there so every route starts at the app
+        self.task = task
+        self.start = time.perf_counter()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def add(self, stack: Tuple[str, ...]):
+        self.stacks[stack] += 1
+        self.samples += 1
+
+class RouteProfile:
+    __slots__ = ("requests", "samples", "await_samples", "wall_seconds", "stacks")
+
+    def __init__(self):
+        self.requests = 0
+        self.samples = 0
+        self.await_samples = 0
+        self.wall_seconds = 0.0
+        self.stacks: Counter = Counter()
+
+# The profiled request a piece of work belongs to; also visible in threadpool workers, which run in a copy of the context
+current_request: ContextVar[Optional[ProfiledRequest]] = ContextVar("current_request", default=None)
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for live requests.
+
+    While a sampled request is in flight, a background thread snapshots every thread's stack each interval.
+    A sample is charged to the request whose middleware frame is on the stack (event loop) or that the
+    threadpool worker registered itself for (see install()); a request found on no stack is suspended, and
+    its await chain is recorded under an (await) leaf instead. Stacks are aggregated per route in the folded format that
+    flamegraph.pl, inferno and speedscope read.
+    """
+
+    def __init__(self, enabled: bool, interval: float, sample_rate: float, max_stacks: int):
+        self.enabled = enabled
+        self.interval = max(0.001, interval)
+        self.sample_rate = sample_rate
+        self.max_stacks = max_stacks
+        self._active: Dict[object, ProfiledRequest] = {}  # middleware frame -> request
+        self._threads: Dict[int, ProfiledRequest] = {}  # threadpool worker thread ident -> request it is running for
+        self._routes: Dict[str, RouteProfile] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def install(self):
+        """Wrap anyio's thread dispatch, which sync endpoints and dependencies and run_in_threadpool all go through,
+        so a worker records which request it runs for; called once at startup when profiling is enabled"""
+        run_sync = anyio.to_thread.run_sync
+        if getattr(run_sync, "_profiler", None) is self:
+            return
+
+        @functools.wraps(run_sync)
+        async def profiled_run_sync(func, *args, **kwargs):
+            if current_request.get() is not None:
+                func = functools.partial(self._run_for_request, func)
+            return await run_sync(func, *args, **kwargs)
+
+        profiled_run_sync._profiler = self
+        anyio.to_thread.run_sync = profiled_run_sync
+
+    def _run_for_request(self, func, *args):
+        # Runs in the worker thread, inside the request's copied context
+        ident = threading.get_ident()
+        self._threads[ident] = current_request.get()
+        try:
+            return func(*args)
+        finally:
+            self._threads.pop(ident, None)
+
+    def should_sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def begin(self, task) -> Tuple[ProfiledRequest, object]:
+        """Called from the middleware; returns the request and the context token to pass to end()"""
+        record = ProfiledRequest(sys._getframe(1), task)
+        with self._lock:
+            self._active[record.frame] = record
+        self._ensure_thread()
+        self._wakeup.set()
+        return record, current_request.set(record)
+
+    def end(self, record: ProfiledRequest, token, route: str):
+        current_request.reset(token)
+        with self._lock:
+            self._active.pop(record.frame, None)
+            profile = self._routes.get(route)
+            if profile is None:
+                profile = self._routes[route] = RouteProfile()
+            profile.requests += 1
+            profile.samples += record.samples
+            profile.wall_seconds += time.perf_counter() - record.start
+            for stack, count in record.stacks.items():
+                if stack and stack[-1] == AWAIT_FRAME:
+                    profile.await_samples += count
+                if stack in profile.stacks or len(profile.stacks) < self.max_stacks:
+                    profile.stacks[stack] += count
+                else:
+                    profile.stacks[(TRUNCATED_FRAME,)] += count
+        record.frame = record.task = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            if not self._active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            started = time.perf_counter()
+            self.sample()
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def sample(self):
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        with self._lock:
+            if not self._active:
+                return
+            charged = set()
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                record, stack = self._attribute(ident, frame)
+                if record is not None:
+                    record.add(stack)
+                    charged.add(record.frame)
+            for entry, record in list(self._active.items()):
+                if entry not in charged and record.task is not None:
+                    record.add(self._await_stack(record))
+
+    def _attribute(self, ident: int, frame) -> Tuple[Optional[ProfiledRequest], Tuple[str, ...]]:
+        # Only code objects and f_back are read from other threads' frames, never their locals
+        worker_record = self._threads.get(ident)
+        if worker_record is not None and worker_record.frame not in self._active:
+            worker_record = None  # the request finished while this worker was still busy
+        walked = []
+        while frame is not None:
+            if worker_record is not None and frame.f_code is _RUN_FOR_REQUEST:
+                return worker_record, (THREADPOOL_FRAME,) + tuple(_label(f.f_code) for f in reversed(walked))
+            record = self._active.get(frame)
+            if record is not None:
+                return record, tuple(_label(f.f_code) for f in reversed(walked))
+            walked.append(frame)
+            frame = frame.f_back
+        return None, ()
+
+    def _await_stack(self, record: ProfiledRequest) -> Tuple[str, ...]:
+        frames = _await_frames(record.task.get_coro())
+        for i, frame in enumerate(frames):
+            if frame is record.frame:
+                frames = frames[i + 1:]
+                break
+        return tuple(_label(f.f_code) for f in frames) + (AWAIT_FRAME,)
+
+    def folded(self, route: Optional[str] = None) -> str:
+        """Folded stacks, one line per distinct stack, rooted at the route so one flamegraph covers every route"""
+        with self._lock:
+            lines = [f"{name};{';'.join(stack)} {count}" for name, profile in sorted(self._routes.items())
+                     if route is None or name == route for stack, count in profile.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def stats(self, top: int = 10) -> Dict:
+        with self._lock:
+            routes = {}
+            for name, profile in sorted(self._routes.items()):
+                leaves: Counter = Counter()
+                for stack, count in profile.stacks.items():
+                    # Waits are told apart by what was awaiting: "(await) OpenAIBackend._stream (...)"
+                    leaf = " ".join(stack[-2:]) if len(stack) > 1 and stack[-1] == AWAIT_FRAME else stack[-1] if stack else "(empty)"
+                    leaves[leaf] += count
+                routes[name] = {
+                    "requests": profile.requests,
+                    "samples": profile.samples,
+                    "mean_wall_ms": round(profile.wall_seconds / profile.requests * 1000, 2) if profile.requests else 0.0,
+                    # Share of samples where the request was suspended rather than running: LLM I/O, queueing, locks
+                    "await_share": round(profile.await_samples / profile.samples, 3) if profile.samples else 0.0,
+                    "top_frames": [{"frame": frame, "share": round(count / profile.samples, 3)} for frame, count in leaves.most_common(top)]
+                }
+            return {
+                "enabled": self.enabled,
+                "interval": self.interval,
+                "sample_rate": self.sample_rate,
+                "active_requests": len(self._active),
+                "routes": routes
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+_RUN_FOR_REQUEST = SamplingProfiler._run_for_request.__code__
+
+profiler = SamplingProfiler(
+    enabled=settings.profiling_enabled,
+    interval=settings.profiling_interval,
+    sample_rate=settings.profiling_sample_rate,
+    max_stacks=settings.profiling_max_stacks
+)
@@ -0,0 +1,169 @@
+import math
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from services.text_analysis import analyze_text
+
+# Sections kept first when a resume has to be cut down; "other" is the untitled header block with the contact details
+SECTION_PRIORITY = ("other", "summary", "experience", "skills", "education", "projects", "certifications", "objective")
+CHARS_PER_TOKEN = 4  # estimate used when tiktoken is not installed
+MIN_PART_TOKENS = 256  # never squeeze the resume or the form below this, even if the budget says so
+TRUNCATED = "[...truncated to fit the prompt budget...]"
+
+APPLICATION_INSTRUCTIONS = """You are a professional resume writer tasked with auto-filling a job application form based on a user's resume. The user message contains the resume, the user's preferences and, last, the scraped form.
+
+Instructions:
+1. Analyze the DOM content to identify all fields requiring auto-completion (e.g., personal information, education, skills, experience, additional questions).
+2. Use 'placeholder' attributes (e.g., 'Enter your full name') or 'name' attributes to infer field purposes.
+3. Generate truthful responses derived from the resume content, tailored to the enhancement focus:
+   - For "Clarity & Conciseness": Provide short, clear answers.
+   - For "Professional Tone": Use formal language and structure.
+   - For "Keywords Optimization": Incorporate the target keywords naturally.
+   - For "Impact & Achievement Focus": Highlight results and accomplishments.
+4. Align responses with the industry focus and reflect the company culture notes where relevant.
+5. Incorporate any additional information provided to enhance specific fields, such as 'Current GPA' if provided in Additional Information.
+6. Suggest a DOM selector for each field (e.g., 'input[placeholder="Enter your full name"]', 'textarea[name="experience"]') based on the DOM structure. If no clear selector is identifiable, omit it.
+7. Return the results in plain text format, one field per line, as 'Field: Value [Selector]' (omit [Selector] if not applicable). Do not include extra explanations or formatting."""
+
+# Structured mode swaps only the output step; OpenAI/Ollama JSON mode enforces the shape on top of this
+APPLICATION_JSON_INSTRUCTIONS = APPLICATION_INSTRUCTIONS.rsplit("\n7. ", 1)[0] + """
+7. Return only a JSON object of the form {"fields": [{"field": "<field label>", "value": "<answer>", "selector": "<selector or null>"}]}, one entry per field. Do not include extra explanations."""
+
+RESUME_ENHANCEMENT_INSTRUCTIONS = """You are a professional resume writer tasked with auto-filling a job application form based on a user's resume. The user message contains the resume, the user's preferences and, last, the job application context.
+
+Instructions:
+1. Analyze the job application context to identify fields requiring auto-completion (e.g., personal information, education, skills, experience, additional questions).
+2. Use the resume content to generate truthful responses, tailored to the enhancement focus:
+   - For "Clarity & Conciseness": Provide short, clear answers.
+   - For "Professional Tone": Use formal language and structure.
+   - For "Keywords Optimization": Incorporate the target keywords naturally.
+   - For "Impact & Achievement Focus": Highlight results and accomplishments.
+3. Align responses with the industry focus and reflect the company culture notes where relevant.
+4. Incorporate any additional information provided to enhance specific fields, such as 'Current GPA' if provided in Additional Information.
+5. Return the results in plain text format, one field per line, as 'Field: Value'. Do not include selectors or extra explanations or formatting."""
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken  # optional: exact counts for OpenAI models
+        return tiktoken.get_encoding(settings.prompt_tokenizer)
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def truncate_lines(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """Keep whole lines from the top until the budget runs out"""
+    if count_tokens(text) <= max_tokens:
+        return text, False
+    kept, used = [], count_tokens(TRUNCATED)
+    for line in text.splitlines():
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            if not kept:
+                # A single oversized line (e.g. an unminimized DOM blob): cut it by characters
+                kept.append(line[:max(0, max_tokens - used) * CHARS_PER_TOKEN])
+            break
+        kept.append(line)
+        used += cost
+    kept.append(TRUNCATED)
+    return "\n".join(kept), True
+
+def truncate_resume(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """Drop or shorten the lowest-priority sections first, keeping the rest in document order"""
+    if count_tokens(text) <= max_tokens:
+        return text, False
+    analysis = analyze_text(text)
+    # Each block runs from the end of the previous section through its own header and body
+    blocks, start = [], 0
+    for name, _, end in analysis.spans:
+        blocks.append((name, analysis.text[start:end].strip("\n")))
+        start = end
+    if not blocks:
+        return truncate_lines(analysis.text, max_tokens)
+
+    rank = {name: i for i, name in enumerate(SECTION_PRIORITY)}
+    order = sorted(range(len(blocks)), key=lambda i: (rank.get(blocks[i][0], len(rank)), i))
+    kept: Dict[int, str] = {}
+    skipped: List[int] = []
+    remaining = max_tokens - count_tokens(TRUNCATED)
+    for i in order:
+        cost = count_tokens(blocks[i][1]) + 1
+        if cost <= remaining:
+            kept[i] = blocks[i][1]
+            remaining -= cost
+        else:
+            skipped.append(i)
+    # Whatever is left goes to the most important section that did not fit whole
+    if skipped and remaining > 0:
+        kept[skipped[0]], _ = truncate_lines(blocks[skipped[0]][1], remaining)
+    parts = [kept[i] for i in sorted(kept)]
+    omitted = sorted({blocks[i][0] for i in range(len(blocks)) if i not in kept})
+    if omitted:
+        parts.append(f"{TRUNCATED} Omitted sections: {', '.join(omitted)}")
+    return "\n".join(parts), True
+
+def format_resume_settings(values: Dict) -> str:
+    lines = [
+        f"Enhancement Focus: {values.get('enhancement_focus') or ''}",
+        f"Industry Focus: {values.get('industry_focus') or ''}",
+        f"Target Keywords: {values.get('target_keywords') or ''}",
+        f"Company Culture Notes: {values.get('company_culture') or ''}"
+    ]
+    additional_info = values.get("additional_info")
+    if additional_info and isinstance(additional_info, dict):
+        lines.append("Additional Information:")
+        lines.extend(f"- {k}: {v}" for k, v in additional_info.items())
+    return "\n".join(lines)
+
+@dataclass
+class PromptBuild:
+    messages: List[Dict[str, str]]
+    estimated_tokens: int
+    truncated: List[str] = field(default_factory=list)
+
+    def metadata(self) -> Dict:
+        return {"estimated_tokens": self.estimated_tokens, "truncated": self.truncated}
+
+class PromptPrefix:
+    """Instructions, resume and settings: byte-identical for every request about the same resume.
+
+    They go first so OpenAI's prompt caching and Ollama's KV cache can reuse them; the
+    per-application part is appended last by build().
+    """
+
+    def __init__(self, instructions: str, resume_content: str, resume_settings: Dict, variable_title: str, budget: Optional[int] = None):
+        self.budget = settings.prompt_token_budget if budget is None else budget
+        self.variable_title = variable_title
+        self.system = instructions
+        settings_block = format_resume_settings(resume_settings)
+        resume, cut = resume_content, False
+        if self.budget:
+            # The resume's share is fixed rather than whatever the form leaves over, so the prefix stays stable
+            resume_budget = int(self.budget * settings.prompt_resume_share) - count_tokens(instructions) - count_tokens(settings_block)
+            resume, cut = truncate_resume(resume_content, max(resume_budget, MIN_PART_TOKENS))
+        self.truncated = ["resume"] if cut else []
+        self.context = f"Resume Content:\n{resume}\n\n{settings_block}"
+        self.tokens = count_tokens(self.system) + count_tokens(self.context)
+
+    def build(self, variable: str) -> PromptBuild:
+        truncated = list(self.truncated)
+        if self.budget:
+            variable, cut = truncate_lines(variable, max(self.budget - self.tokens, MIN_PART_TOKENS))
+            if cut:
+                truncated.append("application")
+        user = f"{self.context}\n\n{self.variable_title}:\n{variable}"
+        messages = [{"role": "system", "content": self.system}, {"role": "user", "content": user}]
+        return PromptBuild(messages, count_tokens(self.system) + count_tokens(user), truncated)
+
+def application_prefix(resume_content: str, resume_settings: Dict, structured: bool = False) -> PromptPrefix:
+    instructions = APPLICATION_JSON_INSTRUCTIONS if structured else APPLICATION_INSTRUCTIONS
+    return PromptPrefix(instructions, resume_content, resume_settings, "Scraped Job Application Form DOM Content")
+
+def enhancement_prefix(resume_content: str, resume_settings: Dict) -> PromptPrefix:
+    return PromptPrefix(RESUME_ENHANCEMENT_INSTRUCTIONS, resume_content, resume_settings, "Job Application Context")
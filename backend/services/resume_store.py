@@ -0,0 +1,138 @@
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+from config import settings
+from models.resume import StoredResume
+from services.cache_service import MemoryCache
+
+class MemoryResumeStore:
+    """Per-process resume sessions with LRU/TTL eviction"""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 0):
+        self._cache = MemoryCache(max_entries=max_entries, ttl=ttl)
+        self._latest_id: Optional[str] = None
+
+    def create(self, record: StoredResume) -> str:
+        resume_id = uuid.uuid4().hex
+        self.put(resume_id, record)
+        self._latest_id = resume_id  # a settings update does not make a resume the most recent upload
+        return resume_id
+
+    def get(self, resume_id: str) -> Optional[StoredResume]:
+        return self._cache.get(resume_id)
+
+    def put(self, resume_id: str, record: StoredResume):
+        record.resume_id = resume_id
+        self._cache.set(resume_id, record)
+
+    def update(self, resume_id: str, changes: Dict) -> Optional[StoredResume]:
+        record = self.get(resume_id)
+        if record is None:
+            return None
+        record = record.with_changes(changes)
+        self.put(resume_id, record)
+        return record
+
+    def delete(self, resume_id: str):
+        self._cache.delete(resume_id)
+
+    def latest(self) -> Optional[StoredResume]:
+        return self.get(self._latest_id) if self._latest_id else None
+
+class SQLiteResumeStore:
+    """Resume sessions shared by every worker process through one SQLite file"""
+
+    blocking = True  # calls wait on disk and on other workers' locks, so async routes make them in the threadpool
+
+    def __init__(self, path: Path, max_entries: int = 1000, ttl: float = 0):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS resumes_accessed_at ON resumes (accessed_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, record: StoredResume) -> str:
+        resume_id = uuid.uuid4().hex
+        self.put(resume_id, record)
+        return resume_id
+
+    def get(self, resume_id: str) -> Optional[StoredResume]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT data, accessed_at FROM resumes WHERE id = ?", (resume_id,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl and row[1] < now - self.ttl:
+                conn.execute("DELETE FROM resumes WHERE id = ?", (resume_id,))
+                return None
+            conn.execute("UPDATE resumes SET accessed_at = ? WHERE id = ?", (now, resume_id))
+        return StoredResume.from_dict(json.loads(row[0]))
+
+    def put(self, resume_id: str, record: StoredResume):
+        now = time.time()
+        record.resume_id = resume_id
+        data = json.dumps(record.to_dict())
+        with self._connect() as conn:
+            # updated_at keeps the upload time, so latest() is the most recent upload rather than the last settings change
+            conn.execute(
+                "INSERT INTO resumes (id, data, updated_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET data = excluded.data, accessed_at = excluded.accessed_at",
+                (resume_id, data, now, now)
+            )
+            self._evict(conn, now)
+
+    def update(self, resume_id: str, changes: Dict) -> Optional[StoredResume]:
+        record = self.get(resume_id)
+        if record is None:
+            return None
+        record = record.with_changes(changes)
+        self.put(resume_id, record)
+        return record
+
+    def delete(self, resume_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM resumes WHERE id = ?", (resume_id,))
+
+    def latest(self) -> Optional[StoredResume]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT id FROM resumes ORDER BY updated_at DESC LIMIT 1").fetchone()
+        return self.get(row[0]) if row else None
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.ttl:
+            conn.execute("DELETE FROM resumes WHERE accessed_at < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM resumes WHERE id NOT IN (SELECT id FROM resumes ORDER BY accessed_at DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+
+def _build_resume_store():
+    if settings.resume_store_backend == "sqlite":
+        path = Path(settings.resume_store_path) if settings.resume_store_path else Path.home() / '.resume-filler' / 'resumes.db'
+        logging.info(f"Using SQLite resume store at {path}")
+        return SQLiteResumeStore(path, settings.resume_store_max_entries, settings.resume_store_ttl)
+    return MemoryResumeStore(settings.resume_store_max_entries, settings.resume_store_ttl)
+
+resume_store = _build_resume_store()
@@ -0,0 +1,196 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+from config import settings
+from services.cache_service import MemoryCache, make_key
+from services.prompt_builder import TRUNCATED, count_tokens
+from services.text_analysis import TextAnalysis, analyze_text
+
+# Sections every excerpt keeps: the untitled header block holds the name and contact details
+PINNED_SECTIONS = ("other", "summary")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_CAMEL = re.compile(r'([a-z])([A-Z])')
+_WORD = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset("a an and are as at be by for from in is it of on or the to with your you please enter select".split())
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+
+def terms(text: str) -> List[str]:
+    words = _WORD.findall(_CAMEL.sub(r'\1 \2', text).lower())
+    return [_stem(word) for word in words if len(word) > 1 and word not in _STOPWORDS]
+
+# Form labels rarely repeat the resume's wording ("School" vs. an Education section), so these words also match the section name
+_SECTION_HINTS = {
+    "education": "school university college degree gpa graduation major minor education study academic",
+    "experience": "employer company job title position role work experience employment year responsibilities manager",
+    "skills": "skill language technology tool proficiency framework programming",
+    "projects": "project portfolio github",
+    "certifications": "certification certificate license",
+    "summary": "summary about yourself bio cover why"
+}
+_HINT_SECTIONS = {term: section for section, words in _SECTION_HINTS.items() for term in terms(words)}
+
+@lru_cache(maxsize=1)
+def _numpy():
+    try:
+        import numpy  # optional: batched scoring as one matrix product
+        return numpy
+    except ImportError:
+        return None
+
+def query_terms(text: str) -> List[str]:
+    found = terms(text)
+    return found + sorted({_HINT_SECTIONS[term] for term in found if term in _HINT_SECTIONS})
+
+def field_query(control: Dict) -> str:
+    """Text describing one form control from dom_service: label, name, placeholder and options"""
+    parts = [control.get(key) or "" for key in ("label", "name", "id", "placeholder")]
+    return " ".join(parts + list(control.get("options") or []))
+
+@dataclass
+class Chunk:
+    section: str
+    block: int  # index of the section span the chunk belongs to
+    text: str
+
+@dataclass
+class Excerpt:
+    text: str
+    chunks: int
+    total_chunks: int
+    tokens: int
+    resume_tokens: int
+    omitted_sections: List[str] = field(default_factory=list)
+
+    def metadata(self) -> Dict:
+        return {"chunks": self.chunks, "total_chunks": self.total_chunks, "tokens": self.tokens, "resume_tokens": self.resume_tokens}
+
+def _chunk(analysis: TextAnalysis, max_tokens: int):
+    """Split each section into runs of whole lines of at most max_tokens; returns (headers, chunks)"""
+    headers, chunks, previous_end = [], [], 0
+    for block, (name, start, end) in enumerate(analysis.spans):
+        headers.append(analysis.text[previous_end:start].strip("\n"))
+        previous_end = end
+        lines, used = [], 0
+        for line in analysis.text[start:end].split("\n"):
+            cost = count_tokens(line) + 1
+            if lines and used + cost > max_tokens:
+                chunks.append(Chunk(name, block, "\n".join(lines)))
+                lines, used = [], 0
+            lines.append(line)
+            used += cost
+        if lines:
+            chunks.append(Chunk(name, block, "\n".join(lines)))
+    return headers, chunks
+
+class ResumeIndex:
+    """BM25 weights for a resume's chunks, as a NumPy matrix when NumPy is installed and sparse rows otherwise"""
+
+    def __init__(self, text: str, chunk_tokens: int):
+        analysis = analyze_text(text)
+        self.tokens = count_tokens(analysis.text)
+        self.headers, self.chunks = _chunk(analysis, chunk_tokens)
+        # The section name counts as a term of each of its chunks so hinted queries can find the section
+        counts = [Counter(terms(chunk.text) + [chunk.section]) for chunk in self.chunks]
+        self.vocabulary = {term: i for i, term in enumerate(sorted({term for count in counts for term in count}))}
+        lengths = [sum(count.values()) for count in counts]
+        average = sum(lengths) / len(lengths) if lengths else 0
+        frequency = Counter(term for count in counts for term in count)
+        total = len(counts)
+        idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in frequency.items()}
+        self.rows: List[Dict[int, float]] = []
+        for count, length in zip(counts, lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average) if average else BM25_K1
+            self.rows.append({self.vocabulary[term]: idf[term] * tf * (BM25_K1 + 1) / (tf + norm) for term, tf in count.items()})
+        self.matrix = None
+        np = _numpy()
+        if np is not None and self.rows:
+            self.matrix = np.zeros((len(self.rows), len(self.vocabulary)), dtype=np.float32)
+            for i, row in enumerate(self.rows):
+                self.matrix[i, list(row)] = list(row.values())
+
+    def top_chunks(self, queries: Sequence[str], top_k: int) -> List[int]:
+        """Union of the top_k positively scoring chunks for each query"""
+        term_ids = [sorted({self.vocabulary[term] for term in query_terms(query) if term in self.vocabulary}) for query in queries]
+        selected = set()
+        np = _numpy()
+        if self.matrix is not None and np is not None:
+            batch = np.zeros((len(term_ids), len(self.vocabulary)), dtype=np.float32)
+            for i, ids in enumerate(term_ids):
+                batch[i, ids] = 1.0
+            scores = batch @ self.matrix.T  # queries x chunks in one product
+            for row in scores:
+                best = np.argsort(-row, kind="stable")[:top_k]
+                selected.update(int(i) for i in best if row[i] > 0)
+            return sorted(selected)
+        for ids in term_ids:
+            scores = [(sum(row.get(i, 0.0) for i in ids), -position) for position, row in enumerate(self.rows)]
+            selected.update(-position for score, position in sorted(scores, reverse=True)[:top_k] if score > 0)
+        return sorted(selected)
+
+    def excerpt(self, queries: Sequence[str], top_k: int, max_share: float) -> Optional[Excerpt]:
+        """The pinned sections plus the chunks relevant to the queries, in document order; None means send the whole resume"""
+        matched = self.top_chunks(queries, top_k)
+        if not matched:
+            return None
+        selected = sorted(set(matched) | {i for i, chunk in enumerate(self.chunks) if chunk.section in PINNED_SECTIONS})
+        parts, last_block = [], None
+        for i in selected:
+            chunk = self.chunks[i]
+            if chunk.block != last_block and self.headers[chunk.block]:
+                parts.append(self.headers[chunk.block])
+            last_block = chunk.block
+            parts.append(chunk.text)
+        kept_blocks = {self.chunks[i].block for i in selected}
+        omitted = sorted({chunk.section for chunk in self.chunks if chunk.block not in kept_blocks})
+        if len(selected) < len(self.chunks):
+            parts.append(f"{TRUNCATED} Only the parts relevant to this form are included" +
+                         (f"; omitted sections: {', '.join(omitted)}" if omitted else ""))
+        text = "\n".join(parts)
+        tokens = count_tokens(text)
+        if tokens >= self.tokens * max_share:
+            return None
+        return Excerpt(text, len(selected), len(self.chunks), tokens, self.tokens, omitted)
+
+class ResumeRetriever:
+    """Per-process cache of resume indexes, built at upload and rebuilt on demand (e.g. in another worker)"""
+
+    def __init__(self, enabled: bool, min_tokens: int, chunk_tokens: int, top_k: int, max_share: float, max_entries: int = 64):
+        self.enabled = enabled
+        self.min_tokens = min_tokens
+        self.chunk_tokens = chunk_tokens
+        self.top_k = top_k
+        self.max_share = max_share
+        self._indexes = MemoryCache(max_entries=max_entries)
+
+    def index(self, resume_content: str) -> Optional[ResumeIndex]:
+        # Short resumes are always sent whole, which keeps the prompt prefix identical across forms
+        if not self.enabled or not resume_content or count_tokens(resume_content) < self.min_tokens:
+            return None
+        key = make_key("retrieval", self.chunk_tokens, resume_content)
+        index = self._indexes.get(key)
+        if index is None:
+            index = ResumeIndex(resume_content, self.chunk_tokens)
+            self._indexes.set(key, index)
+        return index
+
+    def excerpt(self, resume_content: str, queries: Sequence[str], top_k: Optional[int] = None) -> Optional[Excerpt]:
+        queries = [query for query in queries if query and query.strip()]
+        index = self.index(resume_content) if queries else None
+        if index is None:
+            return None
+        return index.excerpt(queries, top_k or self.top_k, self.max_share)
+
+resume_retriever = ResumeRetriever(
+    enabled=settings.retrieval_enabled,
+    min_tokens=settings.retrieval_min_tokens,
+    chunk_tokens=settings.retrieval_chunk_tokens,
+    top_k=settings.retrieval_top_k,
+    max_share=settings.retrieval_max_share
+)
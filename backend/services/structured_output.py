@@ -0,0 +1,196 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from models.schemas import FormField
+from services.field_parser import parse_fields
+
+# FormFillResponse as an OpenAI strict JSON schema: every property required, selector nullable, nothing extra
+FORM_FILL_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "fields": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "field": {"type": "string"},
+                    "value": {"type": "string"},
+                    "selector": {"type": ["string", "null"]}
+                },
+                "required": ["field", "value", "selector"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["fields"],
+    "additionalProperties": False
+}
+
+_FENCE = re.compile(r'^```[a-zA-Z]*\s*|\s*```\s*$')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_MAX_REPAIR_CUTS = 64
+_FIELD_KEYS = ("field", "label", "name")
+_VALUE_KEYS = ("value", "answer")
+
+@dataclass
+class StructuredParse:
+    fields: List[FormField] = field(default_factory=list)
+    repaired: bool = False
+    dropped: int = 0  # items that could not be turned into a field
+
+def _close_open(text: str) -> str:
+    """Append whatever quotes and brackets are still open at the end of text"""
+    stack, in_string, escape = [], False, False
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+    return text + ('"' if in_string else '') + ''.join(reversed(stack))
+
+def repair_json(text: str) -> Tuple[Optional[Any], bool]:
+    """Parse model output as JSON, fixing fences, trailing commas and truncation; returns (data, repaired)"""
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+    cleaned = _FENCE.sub('', text.strip())
+    starts = [i for i in (cleaned.find('{'), cleaned.find('[')) if i >= 0]
+    if not starts:
+        return None, True
+    cleaned = _TRAILING_COMMA.sub(r'\1', cleaned[min(starts):])
+    for candidate in (cleaned, _close_open(cleaned)):
+        try:
+            return json.loads(candidate), True
+        except ValueError:
+            pass
+    # Truncated mid-object: cut back to the end of the last complete object and close what is still open
+    cuts = [i + 1 for i, char in enumerate(cleaned) if char == '}'][-_MAX_REPAIR_CUTS:]
+    for cut in reversed(cuts):
+        try:
+            return json.loads(_close_open(_TRAILING_COMMA.sub(r'\1', cleaned[:cut]))), True
+        except ValueError:
+            continue
+    return None, True
+
+def _to_field(item: Any) -> Optional[FormField]:
+    if not isinstance(item, dict):
+        return None
+    label = next((item[key] for key in _FIELD_KEYS if item.get(key)), None)
+    value = next((item[key] for key in _VALUE_KEYS if key in item), None)
+    if label is None or value is None:
+        return None
+    if not isinstance(value, str):
+        value = ', '.join(map(str, value)) if isinstance(value, list) else json.dumps(value) if isinstance(value, dict) else str(value)
+    try:
+        return FormField(field=str(label), value=value, selector=item.get("selector") or None)
+    except ValidationError:
+        return None
+
+def fields_from_data(data: Any) -> StructuredParse:
+    result = StructuredParse()
+    if isinstance(data, dict) and isinstance(data.get("fields"), list):
+        items = data["fields"]
+    elif isinstance(data, list):
+        items = data
+    elif isinstance(data, dict):
+        # {"Full name": "Jane", ...}: a flat mapping instead of the requested list
+        items = [{"field": key, "value": value} for key, value in data.items()]
+        result.repaired = True
+    else:
+        items = []
+    for item in items:
+        parsed = _to_field(item)
+        if parsed is None:
+            result.dropped += 1
+        else:
+            result.fields.append(parsed)
+    return result
+
+def parse_form_fill(text: str) -> StructuredParse:
+    """Validate a structured completion, repairing it locally instead of asking the model again"""
+    data, repaired = repair_json(text)
+    if data is None:
+        # The model ignored JSON mode entirely; salvage 'Field: Value [Selector]' lines
+        return StructuredParse([FormField(**parsed) for parsed in parse_fields(text)], repaired=True)
+    result = fields_from_data(data)
+    result.repaired = result.repaired or repaired or result.dropped > 0
+    return result
+
+def format_field_lines(fields: List[FormField]) -> str:
+    # The line format keeps one field per line, so multi-line values are flattened
+    lines = []
+    for item in fields:
+        value = ' '.join(item.value.split())
+        lines.append(f"{item.field}: {value} [{item.selector}]" if item.selector else f"{item.field}: {value}")
+    return '\n'.join(lines)
+
+class JsonFieldStreamParser:
+    """Validates streamed JSON output one field object at a time, as each object in the fields array closes"""
+
+    def __init__(self):
+        self.text = ""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._start = -1  # offset in text of the field object being captured
+        self._start_depth = 0
+        self._emitted = set()
+
+    def feed(self, delta: str) -> List[Dict]:
+        offset = len(self.text)
+        self.text += delta
+        fields = []
+        for i, char in enumerate(delta, offset):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if char == '{' and self._start < 0 and self._stack and self._stack[-1] == '[':
+                    self._start, self._start_depth = i, len(self._stack)
+                self._stack.append(char)
+            elif char in '}]' and self._stack:
+                self._stack.pop()
+                if char == '}' and self._start >= 0 and len(self._stack) == self._start_depth:
+                    parsed = self._emit(self.text[self._start:i + 1])
+                    if parsed:
+                        fields.append(parsed)
+                    self._start = -1
+        return fields
+
+    def _emit(self, raw: str) -> Optional[Dict]:
+        try:
+            parsed = _to_field(json.loads(raw))
+        except ValueError:
+            return None
+        if parsed is None:
+            return None
+        return self._mark(parsed)
+
+    def _mark(self, parsed: FormField) -> Optional[Dict]:
+        key = (parsed.field, parsed.selector)
+        if key in self._emitted:
+            return None
+        self._emitted.add(key)
+        return parsed.model_dump()
+
+    def close(self) -> List[Dict]:
+        # Anything the incremental pass could not validate (truncation, a flat mapping, plain lines) gets the full repair
+        return [marked for marked in (self._mark(parsed) for parsed in parse_form_fill(self.text).fields) if marked]
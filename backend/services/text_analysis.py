@@ -0,0 +1,156 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+SECTION_HEADERS = ("experience", "education", "skills", "projects", "summary", "objective", "certifications")
+MAX_HEADER_LENGTH = 50
+WORDS_PER_MINUTE = 200
+
+_HEADER = re.compile('|'.join(SECTION_HEADERS))
+_HEADER_PRIORITY = {name: i for i, name in enumerate(SECTION_HEADERS)}
+_HSPACE = re.compile(r'[^\S\n]+')
+_SENTENCE_END = re.compile(r'[.!?]+')
+
+@dataclass
+class TextAnalysis:
+    text: str
+    # (section, start, end) offsets into text, in document order; a repeated header yields several spans
+    spans: List[Tuple[str, int, int]] = field(default_factory=list)
+    # The same sections as offsets into the text that was fed in; clean_text() of such a slice equals the cleaned section
+    source_spans: List[Tuple[str, int, int]] = field(default_factory=list)
+    word_count: int = 0
+    sentence_count: int = 1
+    paragraph_count: int = 0
+
+    @property
+    def sections(self) -> Dict[str, str]:
+        # Later sections with the same header replace earlier ones, as the old parser did
+        return {name: self.text[start:end] for name, start, end in self.spans}
+
+    @property
+    def estimated_read_time(self) -> int:
+        return self.word_count // WORDS_PER_MINUTE
+
+    @property
+    def summary(self) -> str:
+        return create_summary(self.sections)
+
+    def metrics(self) -> Dict:
+        return {
+            "word_count": self.word_count,
+            "sentence_count": self.sentence_count,
+            "paragraph_count": self.paragraph_count,
+            "estimated_read_time": self.estimated_read_time
+        }
+
+class TextAnalyzer:
+    """Single linear pass producing cleaned text, section spans and counts.
+
+    feed() accepts arbitrary chunks (e.g. one PDF page at a time) so analysis can
+    start before the whole document has been extracted.
+    """
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self._length = 0
+        self._pending = ""
+        self._section = "other"
+        self._section_start = -1
+        self._section_end = -1
+        self._source_offset = 0  # where the next complete line starts in the fed text
+        self._source_start = -1
+        self._source_end = -1
+        self._in_paragraph = False
+        self.result = TextAnalysis(text="")
+
+    def feed(self, chunk: str):
+        lines = (self._pending + chunk).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+
+    def _feed_line(self, raw_line: str):
+        source_start = self._source_offset
+        self._source_offset += len(raw_line) + 1
+        line = _HSPACE.sub(' ', raw_line).strip()
+        if not line:
+            self._in_paragraph = False
+            return
+        result = self.result
+        if not self._in_paragraph:
+            result.paragraph_count += 1
+            self._in_paragraph = True
+        result.word_count += len(line.split())
+        result.sentence_count += len(_SENTENCE_END.findall(line))
+
+        start = self._length + (1 if self._lines else 0)
+        self._lines.append(line)
+        self._length = start + len(line)
+
+        header = self._match_header(line)
+        if header:
+            self._close_section()
+            self._section = header
+        else:
+            if self._section_start < 0:
+                self._section_start, self._source_start = start, source_start
+            self._section_end = self._length
+            self._source_end = source_start + len(raw_line)
+
+    def _match_header(self, line: str):
+        if len(line) >= MAX_HEADER_LENGTH:
+            return None
+        matches = _HEADER.findall(line.lower())
+        return min(matches, key=_HEADER_PRIORITY.__getitem__) if matches else None
+
+    def _close_section(self):
+        if self._section_start >= 0:
+            self.result.spans.append((self._section, self._section_start, self._section_end))
+            self.result.source_spans.append((self._section, self._source_start, self._source_end))
+        self._section_start = self._section_end = self._source_start = self._source_end = -1
+
+    def close(self) -> TextAnalysis:
+        if self._pending:
+            self._feed_line(self._pending)
+            self._pending = ""
+        self._close_section()
+        self.result.text = '\n'.join(self._lines)
+        return self.result
+
+def normalize_newlines(text: str) -> str:
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+def clean_text(text: str) -> str:
+    """What the analyzer keeps of a slice of its input: trimmed, single-spaced, non-empty lines"""
+    lines = (_HSPACE.sub(' ', line).strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+def analyze_text(text: str) -> TextAnalysis:
+    """source_spans index into normalize_newlines(text)"""
+    analyzer = TextAnalyzer()
+    analyzer.feed(normalize_newlines(text))
+    return analyzer.close()
+
+def create_summary(sections: Dict[str, str]) -> str:
+    summary_parts = []
+    if "summary" in sections:
+        summary_parts.append(sections["summary"])
+    if "experience" in sections:
+        exp_sentences = _SENTENCE_END.split(sections["experience"], maxsplit=2)
+        summary_parts.append(' '.join(exp_sentences[:2]))
+    if "skills" in sections:
+        summary_parts.append(f"Key skills include: {sections['skills']}")
+    return ' '.join(summary_parts)
+
+_KEYWORD_SEPARATOR = re.compile(r'[,;\n]')
+
+def keyword_coverage(text: str, keywords: str) -> Dict:
+    """Which of the comma-separated target keywords appear in the text, matched case-insensitively on word boundaries"""
+    wanted = list(dict.fromkeys(k.strip() for k in _KEYWORD_SEPARATOR.split(keywords or '') if k.strip()))
+    lowered = text.lower()
+    matched = [k for k in wanted if re.search(r'(?<!\w)' + re.escape(k.lower()) + r'(?!\w)', lowered)]
+    return {
+        "matched": matched,
+        "missing": [k for k in wanted if k not in matched],
+        "coverage": round(len(matched) / len(wanted), 3) if wanted else None
+    }
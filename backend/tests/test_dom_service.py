@@ -0,0 +1,53 @@
+from services.dom_service import build_manifest, minimize_dom
+
+FORM = """
+<html><head><style>.x { color: red }</style></head><body>
+<script>var label = "<input name='fake'>";</script>
+<form>
+  <label for="first">First name</label>
+  <input id="first" name="first_name" required>
+  <label>Email <input type="email" name="email" placeholder="you@example.com"></label>
+  <input type="hidden" name="csrf" value="token">
+  <select name="country"><option>Canada</option><option> United   States </option></select>
+  <textarea aria-label="Cover letter" name="cover">Prefilled text</textarea>
+  <input type="radio" name="relocate" value="yes"><input type="radio" name="relocate" value="no">
+  <button type="submit">Apply</button>
+</form>
+</body></html>
+"""
+
+def test_minimize_dom_keeps_fillable_controls_with_labels_and_selectors():
+    summary = minimize_dom(FORM)
+
+    assert [control.get("name") for control in summary.fields] == ["first_name", "email", "country", "cover", "relocate", "relocate"]
+    first, email, country, cover, relocate_yes, relocate_no = summary.fields
+    assert first["label"] == "First name" and first["required"] and first["selector"] == "#first"
+    assert email["label"] == "Email" and email["type"] == "email" and email["selector"] == 'input[name="email"]'
+    assert country["options"] == ["Canada", "United States"]
+    assert cover["label"] == "Cover letter" and cover["selector"] == 'textarea[name="cover"]'
+    assert relocate_yes["selector"] == 'input[name="relocate"][value="yes"]'
+    assert relocate_no["selector"] == 'input[name="relocate"][value="no"]'
+
+def test_minimize_dom_manifest_is_smaller_and_skips_script_content():
+    summary = minimize_dom(FORM)
+
+    assert "fake" not in summary.manifest and "csrf" not in summary.manifest and "Prefilled" not in summary.manifest
+    assert summary.manifest.splitlines()[0] == '- label="First name" input type=text name="first_name" id="first" required [#first]'
+    metadata = summary.metadata()
+    assert metadata["fields"] == 6
+    assert metadata["original_chars"] == len(FORM)
+    assert 0 < metadata["minimized_chars"] < len(FORM)
+
+def test_minimize_dom_passes_through_content_without_controls():
+    text = "Senior Engineer at Example Corp. Tell us why you want to join."
+    summary = minimize_dom(text)
+
+    assert summary.manifest == text
+    assert summary.fields == []
+
+def test_build_manifest_for_a_subset_of_fields():
+    fields = minimize_dom(FORM).fields
+
+    manifest = build_manifest([fields[2]])
+
+    assert manifest == '- select name="country" options=Canada | United States [select[name="country"]]'
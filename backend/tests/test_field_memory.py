@@ -0,0 +1,64 @@
+from services.dom_service import minimize_dom
+from services.field_memory import FieldMemory, format_known, memoizable
+
+FORM = """
+<form>
+  <label for="email">Email</label><input type="email" id="email">
+  <label for="phone">Phone</label><input type="tel" id="phone">
+  <label for="name">Full name</label><input id="name">
+  <label for="site">Company website</label><input type="url" id="site">
+  <label for="why">Why do you want to work here?</label><textarea id="why"></textarea>
+</form>
+"""
+
+COMPLETION = "\n".join([
+    "Email: jane@example.com [#email]",
+    "Phone: 555-0100 [#phone]",
+    "Full name: Jane Doe [#name]",
+    "Company website: https://example.com [#site]",
+    "Why do you want to work here?: I like the mission [#why]",
+])
+
+def _fields():
+    return minimize_dom(FORM).fields
+
+def test_only_job_independent_fields_are_memoizable():
+    assert [control["id"] for control in _fields() if memoizable(control)] == ["email", "phone", "name"]
+
+def test_remember_then_split_replays_answers_for_the_same_scope():
+    memory = FieldMemory(max_scopes=10, ttl=0)
+    scope = memory.scope("resume text", {"enhancement_focus": "Impact"})
+
+    assert memory.remember(scope, _fields(), COMPLETION) == 3
+    known, unknown = memory.split(scope, _fields())
+
+    assert [(control["id"], answer) for control, answer in known] == [("email", "jane@example.com"), ("phone", "555-0100"), ("name", "Jane Doe")]
+    assert [control["id"] for control in unknown] == ["site", "why"]
+    assert format_known(known)[0] == "Email: jane@example.com [#email]"
+
+def test_answers_match_by_title_on_another_form():
+    memory = FieldMemory(max_scopes=10, ttl=0)
+    scope = memory.scope("resume text", {})
+    memory.remember(scope, _fields(), COMPLETION)
+
+    other = minimize_dom('<form><label for="e2">Email</label><input type="email" id="e2"></form>').fields
+    known, unknown = memory.split(scope, other)
+
+    assert [(control["selector"], answer) for control, answer in known] == [("#e2", "jane@example.com")]
+    assert unknown == []
+
+def test_scopes_are_separate_per_resume_and_settings():
+    memory = FieldMemory(max_scopes=10, ttl=0)
+    scope = memory.scope("resume text", {"target_keywords": "Python"})
+    memory.remember(scope, _fields(), COMPLETION)
+
+    for other in (memory.scope("other resume", {"target_keywords": "Python"}), memory.scope("resume text", {"target_keywords": "Go"})):
+        known, unknown = memory.split(other, _fields())
+        assert known == [] and len(unknown) == len(_fields())
+
+def test_disabled_memory_remembers_nothing():
+    memory = FieldMemory(max_scopes=10, ttl=0, enabled=False)
+    scope = memory.scope("resume text", {})
+
+    assert memory.remember(scope, _fields(), COMPLETION) == 0
+    assert memory.split(scope, _fields())[0] == []
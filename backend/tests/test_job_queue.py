@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from services.job_queue import JobQueue, QueueFull
+
+def _recorder(started, name, gate=None):
+    async def run():
+        started.append(name)
+        if gate is not None:
+            await gate.wait()
+        return {"name": name}
+    return run
+
+def test_higher_priority_runs_first_and_fifo_within_a_priority():
+    async def scenario():
+        queue, started, gate = JobQueue(workers=1, max_per_client=0, max_queued=10, result_ttl=60), [], asyncio.Event()
+        await queue.submit("blocker", _recorder(started, "blocker", gate))
+        await asyncio.sleep(0)  # the only worker is now busy
+        low, _ = await queue.submit("low", _recorder(started, "low"), priority=0)
+        first, _ = await queue.submit("first", _recorder(started, "first"), priority=5)
+        second, _ = await queue.submit("second", _recorder(started, "second"), priority=5)
+        positions = [(await queue.get(job.id))["position"] for job in (first, second, low)]
+        gate.set()
+        await asyncio.sleep(0.05)
+        await queue.aclose()
+        return started, positions, await queue.get(low.id)
+
+    started, positions, low = asyncio.run(scenario())
+    assert started == ["blocker", "first", "second", "low"]
+    assert positions == [1, 2, 3]
+    assert low["status"] == "succeeded" and low["result"] == {"name": "low"}
+
+def test_busy_client_does_not_take_every_worker():
+    async def scenario():
+        queue, started, gate = JobQueue(workers=2, max_per_client=1, max_queued=10, result_ttl=60), [], asyncio.Event()
+        await queue.submit("a1", _recorder(started, "a1", gate), client="a")
+        await queue.submit("a2", _recorder(started, "a2", gate), client="a")
+        await queue.submit("b1", _recorder(started, "b1", gate), client="b")
+        await asyncio.sleep(0.01)
+        running = list(started)
+        gate.set()
+        await asyncio.sleep(0.05)
+        await queue.aclose()
+        return running, started
+
+    running, started = asyncio.run(scenario())
+    assert running == ["a1", "b1"]  # a2 waits for a1 although a worker was free
+    assert started == ["a1", "b1", "a2"]
+
+def test_identical_unfinished_jobs_are_merged():
+    async def scenario():
+        queue, started, gate = JobQueue(workers=2, max_per_client=0, max_queued=10, result_ttl=60), [], asyncio.Event()
+        job, merged = await queue.submit("same", _recorder(started, "first", gate))
+        duplicate, duplicate_merged = await queue.submit("same", _recorder(started, "second", gate))
+        gate.set()
+        await asyncio.sleep(0.05)
+        again, again_merged = await queue.submit("same", _recorder(started, "third"))
+        await asyncio.sleep(0.05)
+        await queue.aclose()
+        return started, (merged, duplicate_merged, again_merged), duplicate is job, again is job
+
+    started, merged, same, again_same = asyncio.run(scenario())
+    assert started == ["first", "third"]
+    assert merged == (False, True, False)
+    assert same and not again_same
+
+def test_full_queue_rejects_new_jobs():
+    async def scenario():
+        queue, gate = JobQueue(workers=1, max_per_client=0, max_queued=1, result_ttl=60), asyncio.Event()
+        await queue.submit("running", _recorder([], "running", gate))
+        await asyncio.sleep(0)
+        await queue.submit("queued", _recorder([], "queued"))
+        try:
+            with pytest.raises(QueueFull):
+                await queue.submit("rejected", _recorder([], "rejected"))
+        finally:
+            await queue.aclose()
+
+    asyncio.run(scenario())
+
+def test_failed_job_reports_its_error():
+    async def failing():
+        raise ValueError("no LLM backend")
+
+    async def scenario():
+        queue = JobQueue(workers=1, max_per_client=0, max_queued=10, result_ttl=60)
+        job, _ = await queue.submit("failing", failing)
+        await asyncio.sleep(0.01)
+        await queue.aclose()
+        return await queue.get(job.id), await queue.get("unknown")
+
+    snapshot, unknown = asyncio.run(scenario())
+    assert snapshot["status"] == "failed" and snapshot["error"] == "no LLM backend"
+    assert unknown is None
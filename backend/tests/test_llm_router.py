@@ -0,0 +1,49 @@
+import asyncio
+import time
+from config import settings
+from services.llm_router import Completion, LLMBackend, LLMRouter, usage_dict
+
+class SlowBackend(LLMBackend):
+    kind = "test"
+
+    async def _complete(self, messages, json_schema):
+        await asyncio.sleep(10)
+        return Completion("late", usage_dict(self.name, self.model))
+
+    async def _stream(self, messages, usage, json_schema):
+        for _ in range(10):
+            await asyncio.sleep(0)
+            yield "token "
+
+def _half_open(backend: LLMBackend):
+    backend.opened_at = time.monotonic() - settings.llm_circuit_cooldown - 1
+    assert backend.state == "half_open" and backend.available()
+
+def test_cancelled_trial_frees_half_open_backend():
+    async def scenario():
+        backend = SlowBackend("slow", "m", "http://slow", LLMRouter())
+        _half_open(backend)
+        task = asyncio.create_task(backend.complete([{"role": "user", "content": "hi"}]))
+        await asyncio.sleep(0.01)
+        assert not backend.available()  # the single trial is running
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert backend.state == "half_open"
+    assert backend.available()
+    assert backend.failures == 0
+
+def test_closed_trial_stream_frees_half_open_backend():
+    async def scenario():
+        backend = SlowBackend("slow", "m", "http://slow", LLMRouter())
+        _half_open(backend)
+        stream = backend.stream([{"role": "user", "content": "hi"}], {})
+        await stream.__anext__()
+        await stream.aclose()  # consumer went away mid-stream
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert backend.available()
+    assert backend.failures == 0
@@ -0,0 +1,42 @@
+import asyncio
+import hashlib
+import uuid
+from services.cache_service import parse_cache
+from services.extraction_service import ExtractionExecutor
+from services.file_service import file_service
+
+def _resume() -> bytes:
+    # Unique per test so entries left in the process-wide parse cache by other tests never match
+    return f"Jane Doe {uuid.uuid4().hex}\nExperience\nBuilt the billing pipeline at Example Corp.\n".encode()
+
+def test_key_changes_with_every_input_that_changes_the_result():
+    digest = hashlib.sha256(b"resume").hexdigest()
+    base = file_service.parse_cache_key("pdf", digest, 50, 100000)
+
+    assert file_service.parse_cache_key("pdf", digest, 50, 100000) == base
+    assert len({
+        base,
+        file_service.parse_cache_key("docx", digest, 50, 100000),
+        file_service.parse_cache_key("pdf", hashlib.sha256(b"other").hexdigest(), 50, 100000),
+        file_service.parse_cache_key("pdf", digest, 100, 100000),
+        file_service.parse_cache_key("pdf", digest, 50, 200000),
+    }) == 5
+
+def test_identical_upload_is_served_from_the_cache():
+    executor = ExtractionExecutor(workers=0, timeout=5)
+    content = _resume()
+
+    first = asyncio.run(executor.parse_upload(content, "txt"))
+    hits = parse_cache.stats()["hits"]
+    second = asyncio.run(executor.parse_upload(content, "txt", hashlib.sha256(content).hexdigest()))
+
+    assert second == first
+    assert parse_cache.stats()["hits"] == hits + 1
+
+def test_raising_the_character_cap_re_extracts_the_full_text():
+    content = _resume()
+    capped = asyncio.run(ExtractionExecutor(workers=0, timeout=5, max_chars=20).parse_upload(content, "txt"))
+    uncapped = asyncio.run(ExtractionExecutor(workers=0, timeout=5, max_chars=0).parse_upload(content, "txt"))
+
+    assert capped["text"] == content.decode()[:20]
+    assert uncapped["text"] == content.decode()
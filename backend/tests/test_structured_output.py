@@ -0,0 +1,55 @@
+import json
+from services.structured_output import parse_form_fill, repair_json
+
+def _payload(*fields):
+    return json.dumps({"fields": [dict(zip(("field", "value", "selector"), item)) for item in fields]})
+
+def test_valid_json_is_not_repaired():
+    result = parse_form_fill(_payload(("Email", "jane@example.com", "#email"), ("Phone", "555-0100", None)))
+
+    assert not result.repaired and result.dropped == 0
+    assert [(item.field, item.value, item.selector) for item in result.fields] == [
+        ("Email", "jane@example.com", "#email"), ("Phone", "555-0100", None)
+    ]
+
+def test_fenced_json_with_trailing_comma_is_repaired():
+    text = '```json\n{"fields": [{"field": "Email", "value": "jane@example.com", "selector": "#email"},]}\n```'
+
+    result = parse_form_fill(text)
+
+    assert result.repaired
+    assert [item.value for item in result.fields] == ["jane@example.com"]
+
+def test_truncated_json_keeps_the_complete_fields():
+    text = _payload(("Email", "jane@example.com", "#email"), ("Cover letter", "I have long admired", "#cover"))
+    truncated = text[:text.index("long")]
+
+    result = parse_form_fill(truncated)
+
+    assert result.repaired
+    assert result.fields[0].value == "jane@example.com"
+
+def test_invalid_items_are_dropped_and_non_string_values_flattened():
+    text = json.dumps({"fields": [{"field": "Skills", "value": ["Python", "SQL"]}, {"value": "no label"}, "junk"]})
+
+    result = parse_form_fill(text)
+
+    assert result.repaired and result.dropped == 2
+    assert [(item.field, item.value) for item in result.fields] == [("Skills", "Python, SQL")]
+
+def test_flat_mapping_is_accepted_as_repaired():
+    result = parse_form_fill('{"Full name": "Jane Doe", "Years of experience": 5}')
+
+    assert result.repaired
+    assert [(item.field, item.value) for item in result.fields] == [("Full name", "Jane Doe"), ("Years of experience", "5")]
+
+def test_plain_text_lines_are_salvaged():
+    result = parse_form_fill("Email: jane@example.com [#email]\nPhone: 555-0100")
+
+    assert result.repaired
+    assert [(item.field, item.value, item.selector) for item in result.fields] == [
+        ("Email", "jane@example.com", "#email"), ("Phone", "555-0100", None)
+    ]
+
+def test_repair_json_gives_up_without_any_json():
+    assert repair_json("no json here") == (None, True)
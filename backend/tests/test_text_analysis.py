@@ -0,0 +1,56 @@
+from services.text_analysis import TextAnalyzer, analyze_text, clean_text, normalize_newlines
+
+RESUME = (
+    "Jane Doe\n"
+    "jane@example.com\n"
+    "\n"
+    "Professional   Summary\n"
+    "Backend engineer.   Ships things!\n"
+    "\n"
+    "Work Experience\n"
+    "Example Corp - Senior Engineer\n"
+    "  Built the billing pipeline.\n"
+    "\n"
+    "Technical Skills & Education Highlights\n"
+    "Python, SQL\n"
+)
+
+def test_sections_are_detected_in_one_pass():
+    analysis = analyze_text(RESUME)
+
+    assert [name for name, _, _ in analysis.spans] == ["other", "summary", "experience", "education"]
+    assert analysis.sections["experience"] == "Example Corp - Senior Engineer\nBuilt the billing pipeline."
+    assert analysis.sections["summary"] == "Backend engineer. Ships things!"
+    # A header naming several sections is filed under the one listed first in SECTION_HEADERS
+    assert analysis.sections["education"] == "Python, SQL"
+
+def test_counts():
+    analysis = analyze_text(RESUME)
+
+    assert analysis.word_count == len(RESUME.split())
+    assert analysis.paragraph_count == 4
+    assert analysis.sentence_count == 1 + 4  # the dot in the email address counts too
+
+def test_long_lines_are_not_headers():
+    analysis = analyze_text("Experience\n" + "I gained experience in many areas of software engineering work\n")
+
+    assert list(analysis.sections) == ["experience"]
+
+def test_chunked_feed_matches_whole_text():
+    analyzer = TextAnalyzer()
+    for i in range(0, len(RESUME), 7):
+        analyzer.feed(RESUME[i:i + 7])
+    chunked = analyzer.close()
+
+    whole = analyze_text(RESUME)
+    assert chunked.text == whole.text
+    assert chunked.spans == whole.spans
+    assert chunked.metrics() == whole.metrics()
+
+def test_source_spans_point_into_the_fed_text():
+    text = "Skills\r\n  Python,   Go  \r\n\r\nExperience\r\nAcme\r\n"
+    analysis = analyze_text(text)
+    source = normalize_newlines(text)
+
+    for (name, start, end), (_, clean_start, clean_end) in zip(analysis.source_spans, analysis.spans):
+        assert clean_text(source[start:end]) == analysis.text[clean_start:clean_end]
@@ -0,0 +1,62 @@
+import asyncio
+import json
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from middleware import MULTIPART_OVERHEAD, UploadLimitMiddleware
+
+MAX_BYTES = 1000
+LIMIT = MAX_BYTES + MULTIPART_OVERHEAD
+
+async def echo(request):
+    return JSONResponse({"received": len(await request.body())})
+
+def _app():
+    inner = Starlette(routes=[Route("/upload", echo, methods=["POST"]), Route("/other", echo, methods=["POST"])])
+    return UploadLimitMiddleware(inner, max_bytes=MAX_BYTES, paths=["/upload"])
+
+def _post(path: str, chunks, headers=()):
+    """Drive the ASGI app directly so the body can be sent in chunks with or without a Content-Length"""
+    messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1} for i, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80)
+    }
+    asyncio.run(_app()(scope, receive, send))
+    starts = [message for message in sent if message["type"] == "http.response.start"]
+    assert len(starts) == 1
+    body = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    return starts[0]["status"], json.loads(body)
+
+def test_content_length_over_the_limit_is_rejected_before_reading():
+    status, body = _post("/upload", [b"x"], headers=[("content-length", str(LIMIT + 1))])
+
+    assert status == 413
+    assert body == {"detail": f"Upload exceeds the maximum size of {MAX_BYTES} bytes"}
+
+def test_chunked_body_over_the_limit_is_rejected():
+    chunk = b"x" * 16384
+    status, body = _post("/upload", [chunk] * (LIMIT // len(chunk) + 2))
+
+    assert status == 413
+    assert "maximum size" in body["detail"]
+
+def test_bodies_within_the_limit_pass_through():
+    assert _post("/upload", [b"x" * 500, b"y" * 500]) == (200, {"received": 1000})
+    assert _post("/upload", [b"x" * 10], headers=[("content-length", "10")]) == (200, {"received": 10})
+
+def test_other_paths_are_not_limited():
+    chunk = b"x" * 16384
+    chunks = [chunk] * (LIMIT // len(chunk) + 2)
+
+    assert _post("/other", chunks) == (200, {"received": len(chunk) * len(chunks)})
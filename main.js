@@ -125,21 +125,21 @@ async function applyChanges() {
       }
     });
 
-    const resumeResponse = await fetch('http://localhost:8000/api/resume/last_upload', { method: 'GET' });
-    const resumeData = await resumeResponse.json();
-    if (resumeData.status !== 'success' || !resumeData.content) {
+    // Only the settings change, so update them on the stored resume instead of uploading it again
+    const response = await fetch('http://localhost:8000/api/resume/settings', {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        enhancement_focus: enhancementFocus,
+        industry_focus: industryFocus,
+        target_keywords: targetKeywords,
+        company_culture: companyCulture,
+        additional_info: additionalInfo
+      })
+    });
+    if (response.status === 404) {
       throw new Error('No resume uploaded yet. Please upload a resume first.');
     }
-
-    const formData = new FormData();
-    formData.append('file', new Blob([resumeData.content], { type: resumeData.file_type }));
-    formData.append('enhancement_focus', enhancementFocus);
-    formData.append('industry_focus', industryFocus);
-    formData.append('target_keywords', targetKeywords);
-    formData.append('company_culture', companyCulture);
-    formData.append('additional_info', JSON.stringify(additionalInfo));
-
-    const response = await fetch('http://localhost:8000/api/resume/upload', { method: 'POST', body: formData });
     const result = await response.json();
     if (result.status === 'success') {
       await handleRefreshResumeData();
@@ -346,11 +346,13 @@ window.handleResumeData = (data) => {
   if (dataContainer && data.parsed_sections) {
     const metrics = data.metadata;
     const settings = data.settings || {};
+    const coverage = data.keyword_coverage;
     dataContainer.innerHTML = `
       <div class="text-lemon_chiffon-500">
         <div class="mb-4 grid grid-cols-2 gap-4">
           <div><span class="font-semibold">Words:</span> ${metrics.word_count}<span class="ml-4 font-semibold">Read Time:</span> ${metrics.estimated_read_time}m</div>
           <div><span class="font-semibold">Sentences:</span> ${metrics.sentence_count}</div>
+          ${coverage && coverage.coverage !== null ? `<div class="col-span-2"><span class="font-semibold">Keyword Coverage:</span> ${Math.round(coverage.coverage * 100)}%${coverage.missing.length ? ` (missing: ${coverage.missing.join(', ')})` : ''}</div>` : ''}
         </div>
         <h4 class="font-semibold text-naples_yellow-500 mt-2">Parsed Resume Sections</h4>
         <div class="whitespace-pre-wrap font-mono text-sm bg-yale_blue-300 p-4 rounded-lg max-h-[200px] overflow-y-auto">${JSON.stringify(data.parsed_sections, null, 2)}</div>